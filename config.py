@@ -77,6 +77,9 @@ POSTGRES_PORT     = env_int("POSTGRES_PORT", 5432) or 5432
 SYNC_DATABASE_URL  = build_sync_dsn(POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB)
 ASYNC_DATABASE_URL = build_async_dsn(POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB)
 
+# Scratch database for src/bench; its schema is dropped and reseeded on every run
+BENCH_DATABASE_URL = env("BENCH_DATABASE_URL", "")
+
 BASE_DIR = pathlib.Path(__file__).resolve().parent
 WORKING_DIR = BASE_DIR
 
@@ -88,14 +91,31 @@ LOGS_DIR      = BASE_DIR / "logs"
 DOWNLOADS_DIR = DATA_DIR / "downloads"
 GIVEAWAYS_DIR = DATA_DIR / "giveaways"
 SPENDS_DIR    = DATA_DIR / "spends"
+# Resized WebP copies of IMAGES_DIR (src/webapp/images.py), served immutable under IMAGE_URL_PREFIX
+IMAGE_VARIANTS_DIR = DATA_DIR / "images"
+IMAGE_URL_PREFIX   = "/img"
+# Recorded 1C responses for offline sync replays (src/onec/fixtures.py)
+ONEC_FIXTURES_DIR  = DATA_DIR / "onec_fixtures"
+# Ring buffer of the last SYNC_HISTORY_SIZE 1C sync runs (src/onec/history.py)
+SYNC_HISTORY_FILE  = DATA_DIR / "sync_history.json"
+# Catalog version shared by the webapp workers, the 1C worker and the admin bot (src/webapp/catalog.py)
+CATALOG_VERSION_FILE = DATA_DIR / "catalog_version.json"
 TEMPLATES_DIR = BASE_DIR / "src" / "webapp" / "templates"
 
-for d in (DATA_DIR, DOWNLOADS_DIR, GIVEAWAYS_DIR, SPENDS_DIR): d.mkdir(parents=True, exist_ok=True)
+for d in (DATA_DIR, DOWNLOADS_DIR, GIVEAWAYS_DIR, SPENDS_DIR, IMAGE_VARIANTS_DIR): d.mkdir(parents=True, exist_ok=True)
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 ENTERPRISE_LOGIN    = env("ENTERPRISE_LOGIN", "")
 ENTERPRISE_PASSWORD = env("ENTERPRISE_PASSWORD", "")
 ENTERPRISE_URL      = env("ENTERPRISE_URL", "")
+# OData paging: pages of ENTERPRISE_PAGE_SIZE records (or the publication's lower $top cap), up to ENTERPRISE_PAGE_CONCURRENCY pages of one feed in flight;
+# ENTERPRISE_ODATA_FORMAT=json asks for $format=json when the publication supports it (default: Atom XML)
+ENTERPRISE_PAGE_SIZE        = env_int("ENTERPRISE_PAGE_SIZE", 2000) or 2000
+ENTERPRISE_PAGE_CONCURRENCY = env_int("ENTERPRISE_PAGE_CONCURRENCY", 4) or 1
+ENTERPRISE_ODATA_FORMAT     = env("ENTERPRISE_ODATA_FORMAT", "xml").lower()
+# Upserts of at least this many rows go through COPY into a staging table (0 turns it off)
+ENTERPRISE_COPY_THRESHOLD   = env_int("ENTERPRISE_COPY_THRESHOLD", 5000)
+SYNC_HISTORY_SIZE           = env_int("SYNC_HISTORY_SIZE", 50) or 50
 
 CDEK_ACCOUNT         = env("CDEK_ACCOUNT", "")
 CDEK_SECURE_PASSWORD = env("CDEK_SECURE_PASSWORD", "")
@@ -151,6 +171,12 @@ BOT_KEYWORDS = {
 }
 
 API_PREFIX = "/api/v1"
+SEARCH_BACKEND = env("SEARCH_BACKEND", "index")
+SEARCH_CACHE_SIZE = env_int("SEARCH_CACHE_SIZE", 2048)
+SEARCH_CACHE_TTL = env_int("SEARCH_CACHE_TTL", 900)
+# Catalog reads carry an ETag; "no-cache" lets clients keep the body but revalidate it on every open
+CATALOG_CACHE_CONTROL = env("CATALOG_CACHE_CONTROL", "public, no-cache")
+PRODUCT_BATCH_LIMIT = env_int("PRODUCT_BATCH_LIMIT", 300)
 SMTP_USER          = env("SMTP_USER", "")
 SMTP_PASSWORD      = env("SMTP_PASSWORD", "")
 WEBAPP_BASE_DOMAIN = env("WEBAPP_BASE_DOMAIN", "")
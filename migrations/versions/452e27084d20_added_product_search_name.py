@@ -0,0 +1,49 @@
+"""added product search name
+
+Revision ID: 452e27084d20
+Revises: 444f15fd29b6
+Create Date: 2026-10-17 11:02:14.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from transliterate import translit
+
+
+revision: str = '452e27084d20'
+down_revision: Union[str, Sequence[str], None] = '444f15fd29b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def _normalize(text: str) -> str:
+    """Same as src.helpers.normalize, kept local so the migration does not import the app."""
+    try: return translit(text, "ru", reversed=True).lower()
+    except Exception: return text.lower()
+
+
+def _backfill_search_names() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT id, name FROM products")).all()
+    update = sa.text("UPDATE products SET search_name = :search_name WHERE id = :id")
+    for i in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        chunk = rows[i: i + BACKFILL_BATCH_SIZE]
+        bind.execute(update, [{"id": row.id, "search_name": _normalize(row.name or "")} for row in chunk])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('products', sa.Column('search_name', sa.String(), nullable=True))
+    _backfill_search_names()
+    op.create_index('ix_products_search_name_trgm', 'products', ['search_name'], unique=False, postgresql_using='gin', postgresql_ops={'search_name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_products_search_name_trgm', table_name='products', postgresql_using='gin')
+    op.drop_column('products', 'search_name')
@@ -0,0 +1,39 @@
+"""added user search columns
+
+Revision ID: 5b1e9c3d7a42
+Revises: 452e27084d20
+Create Date: 2026-10-17 12:20:41.552903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5b1e9c3d7a42'
+down_revision: Union[str, Sequence[str], None] = '452e27084d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = {
+    'tg_id_text': ("tg_id::text", False),
+    'phone_digits': ("regexp_replace(phone, '\\D', '', 'g')", True),
+    'tg_phone_digits': ("regexp_replace(tg_phone, '\\D', '', 'g')", True),
+    'search_full_name': ("coalesce(nullif(trim(coalesce(name, '') || ' ' || coalesce(surname, '')), ''), 'Без имени')", False),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, (expression, nullable) in SEARCH_COLUMNS.items():
+        op.add_column('users', sa.Column(name, sa.String(), sa.Computed(expression, persisted=True), nullable=nullable))
+        op.create_index(f'ix_users_{name}_trgm', 'users', [name], unique=False, postgresql_using='gin', postgresql_ops={name: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(SEARCH_COLUMNS):
+        op.drop_index(f'ix_users_{name}_trgm', table_name='users', postgresql_using='gin')
+        op.drop_column('users', name)
@@ -0,0 +1,59 @@
+"""added product listings
+
+Revision ID: 6c2f0d4e8b13
+Revises: 5b1e9c3d7a42
+Create Date: 2026-10-17 13:05:27.740116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '6c2f0d4e8b13'
+down_revision: Union[str, Sequence[str], None] = '5b1e9c3d7a42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('product_listings',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('has_stock', sa.Boolean(), nullable=False),
+    sa.Column('stock_rank', sa.SmallInteger(), nullable=False),
+    sa.Column('min_stock_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('max_stock_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('sort_price_asc', sa.Numeric(), nullable=False),
+    sa.Column('sort_price_desc', sa.Numeric(), nullable=False),
+    sa.Column('lower_name', sa.String(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.execute("""
+        INSERT INTO product_listings (product_id, has_stock, stock_rank, min_stock_price, max_stock_price, sort_price_asc, sort_price_desc, lower_name, refreshed_at)
+        SELECT s.id, s.has_stock, CASE WHEN s.has_stock THEN 0 ELSE 1 END, s.min_price, s.max_price, coalesce(s.min_price, 99999999999), coalesce(s.max_price, -1), s.lower_name, now()
+        FROM (
+            SELECT p.id, coalesce(bool_or(f.balance > 0), false) AS has_stock,
+                   min(CASE WHEN f.balance > 0 THEN f.price END) AS min_price,
+                   max(CASE WHEN f.balance > 0 THEN f.price END) AS max_price,
+                   lower(p.name) AS lower_name
+            FROM products p LEFT JOIN features f ON f.product_onec_id = p.onec_id
+            GROUP BY p.id
+        ) s
+    """)
+    op.create_index('ix_product_listings_name_asc', 'product_listings', ['stock_rank', 'lower_name', 'sort_price_asc', 'product_id'], unique=False)
+    op.create_index('ix_product_listings_name_desc', 'product_listings', ['stock_rank', sa.text('lower_name DESC'), 'sort_price_asc', 'product_id'], unique=False)
+    op.create_index('ix_product_listings_price_asc', 'product_listings', ['stock_rank', 'sort_price_asc', 'lower_name', 'product_id'], unique=False)
+    op.create_index('ix_product_listings_price_desc', 'product_listings', ['stock_rank', sa.text('sort_price_desc DESC'), 'lower_name', 'product_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_listings_price_desc', table_name='product_listings')
+    op.drop_index('ix_product_listings_price_asc', table_name='product_listings')
+    op.drop_index('ix_product_listings_name_desc', table_name='product_listings')
+    op.drop_index('ix_product_listings_name_asc', table_name='product_listings')
+    op.drop_table('product_listings')
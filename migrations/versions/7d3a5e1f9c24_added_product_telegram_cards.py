@@ -0,0 +1,32 @@
+"""added product telegram cards
+
+Revision ID: 7d3a5e1f9c24
+Revises: 6c2f0d4e8b13
+Create Date: 2026-10-17 15:42:08.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7d3a5e1f9c24'
+down_revision: Union[str, Sequence[str], None] = '6c2f0d4e8b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Left NULL here: the next 1C sync renders every card (refresh_product_cards), Product.__str__ renders on the spot until then
+    op.add_column('products', sa.Column('tg_card', sa.Text(), nullable=True))
+    op.add_column('products', sa.Column('tg_card_text', sa.Text(), nullable=True))
+    op.add_column('products', sa.Column('tg_card_hash', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('products', 'tg_card_hash')
+    op.drop_column('products', 'tg_card_text')
+    op.drop_column('products', 'tg_card')
@@ -0,0 +1,34 @@
+"""added catalog is_active
+
+Revision ID: 9e4b2c7a1d58
+Revises: 7d3a5e1f9c24
+Create Date: 2026-10-17 18:06:51.274930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '9e4b2c7a1d58'
+down_revision: Union[str, Sequence[str], None] = '7d3a5e1f9c24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Everything starts active; the next 1C sync deactivates what is no longer in its feed
+    op.add_column('products', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False))
+    op.add_column('features', sa.Column('is_active', sa.Boolean(), server_default=sa.true(), nullable=False))
+    op.create_index('ix_products_active_id', 'products', ['id'], unique=False, postgresql_where=sa.text('is_active'))
+    op.create_index('ix_features_active_product_onec_id', 'features', ['product_onec_id'], unique=False, postgresql_where=sa.text('is_active'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_features_active_product_onec_id', table_name='features', postgresql_where=sa.text('is_active'))
+    op.drop_index('ix_products_active_id', table_name='products', postgresql_where=sa.text('is_active'))
+    op.drop_column('features', 'is_active')
+    op.drop_column('products', 'is_active')
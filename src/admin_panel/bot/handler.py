@@ -1,3 +1,4 @@
+import time
 import aiofiles
 
 from aiogram import Router
@@ -8,13 +9,15 @@ from aiogram.types import InputTextMessageContent, InlineQueryResultArticle, Mes
 
 from config import OWNER_TG_IDS, IMAGES_DIR
 from src.admin_panel.bot import texts, keyboards, states
-from src.admin_panel.bot.helpers import __handle_product_message, __handle_photo
-from src.webapp import get_session
-from src.webapp.routes.search import search_products
+from src.admin_panel.bot.helpers import __handle_product_message, __handle_photo, __inline_products
+from src.onec.history import describe, sync_history
+from src.webapp import catalog, get_session
+from src.webapp.images import delete_variants
 from src.webapp.schemas import TgCategoryCreate
 from src.webapp.crud import create_tg_category, list_tg_categories, get_tg_category_by_id, get_tg_category_by_name, delete_tg_category, add_tg_category_to_product, remove_tg_category_from_product, get_product_with_features
 
 router = Router()
+SYNC_STATUS_RUNS = 10
 admin_filter = lambda obj: obj.from_user and obj.from_user.id in OWNER_TG_IDS and obj.chat.type == ChatType.PRIVATE
 admin_call_filter = lambda obj: obj.from_user and obj.from_user.id in OWNER_TG_IDS and obj.message.chat.type == ChatType.PRIVATE
 admin_inline_filter = lambda obj: obj.from_user and obj.from_user.id in OWNER_TG_IDS
@@ -44,6 +47,18 @@ async def handle_feature_photo(message: Message, state: FSMContext):
     await __handle_photo(feature_onec_id, message, state)
 
 
+@router.message(Command("sync_status"))
+async def handle_sync_status(message: Message):
+    runs = sync_history.runs(limit=SYNC_STATUS_RUNS)
+    if not runs: return await message.answer("Синхронизаций с 1С ещё не было.")
+
+    now = time.time()
+    freshness = "\n".join(f"🕒 Последняя успешная <b>{kind}</b>: {int(now - finished_at) // 60} мин назад" for kind, finished_at in sync_history.last_success().items())
+    latest: dict[str, dict] = {}
+    for run in runs: latest.setdefault(run["kind"], run)
+    return await message.answer("\n\n".join([freshness, *(describe(run, detailed=True) for run in latest.values()), "\n".join(describe(run) for run in runs)]).strip())
+
+
 @router.message(Command("create_category"))
 async def handle_create_category(message: Message):
     name = message.text.removeprefix("/create_category").strip()
@@ -113,8 +128,8 @@ async def inline_addcat(inline_query: InlineQuery, state: FSMContext):
     query = inline_query.query.removeprefix("addcat").strip()
     if not query: return None
 
-    async with get_session() as db: data = await search_products(db, q=query, page=0, limit=10)
-    results = [InlineQueryResultArticle(id=str(idx), title=item["name"], description=", ".join(f["name"] for f in item["features"]), input_message_content=InputTextMessageContent(message_text=f"/add_category {category_id} {item["url"].removeprefix("/product/")}")) for idx, item in enumerate(data["results"], start=1)]
+    items = await __inline_products(query)
+    results = [InlineQueryResultArticle(id=str(idx), title=item["name"], description=", ".join(f["name"] for f in item["features"]), input_message_content=InputTextMessageContent(message_text=f"/add_category {category_id} {item["url"].removeprefix("/product/")}")) for idx, item in enumerate(items, start=1)]
     return await inline_query.answer(results, cache_time=1)
 
 
@@ -126,9 +141,9 @@ async def inline_rmcat(inline_query: InlineQuery, state: FSMContext):
 
     query = inline_query.query.removeprefix("rmcat").strip()
     if not query: return None
-    async with get_session() as db: data = await search_products(db, q=query, page=0, limit=10)
+    items = await __inline_products(query)
 
-    results = [InlineQueryResultArticle(id=str(idx), title=item["name"], description=", ".join(f["name"] for f in item["features"]), input_message_content=InputTextMessageContent(message_text=f"/remove_category {category_id} {item["url"].removeprefix("/product/")}")) for idx, item in enumerate(data["results"], start=1)]
+    results = [InlineQueryResultArticle(id=str(idx), title=item["name"], description=", ".join(f["name"] for f in item["features"]), input_message_content=InputTextMessageContent(message_text=f"/remove_category {category_id} {item["url"].removeprefix("/product/")}")) for idx, item in enumerate(items, start=1)]
     return await inline_query.answer(results, cache_time=1)
 
 
@@ -136,9 +151,9 @@ async def inline_rmcat(inline_query: InlineQuery, state: FSMContext):
 async def set_product_photo(inline_query: InlineQuery):
     query = inline_query.query.removeprefix("photo").strip()
     if not query: return None
-    async with get_session() as db: data = await search_products(db, q=query, page=0, limit=10)
+    items = await __inline_products(query)
 
-    results = [InlineQueryResultArticle(id=str(idx), title=item["name"], description=", ".join(f["name"] for f in item["features"]), input_message_content=InputTextMessageContent(message_text=f'/photo {item["url"].removeprefix("/product/")}')) for idx, item in enumerate(data["results"], start=1)]
+    results = [InlineQueryResultArticle(id=str(idx), title=item["name"], description=", ".join(f["name"] for f in item["features"]), input_message_content=InputTextMessageContent(message_text=f'/photo {item["url"].removeprefix("/product/")}')) for idx, item in enumerate(items, start=1)]
     return await inline_query.answer(results, cache_time=1)
 
 
@@ -164,6 +179,8 @@ async def handle_callback(call: CallbackQuery, state: FSMContext):
         onec_id = payload
         photo_path = IMAGES_DIR / f"{onec_id}.png"
         if photo_path.exists(): photo_path.unlink()
+        delete_variants(onec_id)
+        catalog.bump()
         await call.message.edit_text("Фото успешно удалено", reply_markup=None)
         return await call.answer()
 
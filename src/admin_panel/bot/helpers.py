@@ -5,8 +5,10 @@ from aiogram.types import FSInputFile, Message
 
 from config import IMAGES_DIR
 from src.admin_panel.bot import keyboards, states, texts
-from src.webapp import get_session
+from src.webapp import catalog, get_session
 from src.webapp.crud import get_product_with_features
+from src.webapp.crud.search import search_products, suggest_products
+from src.webapp.images import save_variants
 
 
 async def __handle_product_message(onec_id: str, message: Message, state: FSMContext):
@@ -34,5 +36,14 @@ async def __handle_photo(onec_id: str, message: Message, state: FSMContext):
     file_bytes = file_bytes.getvalue()
     photo_path = IMAGES_DIR / f"{onec_id}.png"
     async with aiofiles.open(photo_path, "wb") as f: await f.write(file_bytes)
+    if await save_variants(onec_id, file_bytes): catalog.bump()
     await message.answer("Фото успешно сохранено")
-    return await state.clear()
\ No newline at end of file
+    return await state.clear()
+
+
+async def __inline_products(query: str, limit: int = 10) -> list[dict]:
+    async with get_session() as db:
+        items = await suggest_products(db, query, limit)
+        if not items: items = (await search_products(db, q=query, page=0, limit=limit))["results"]
+
+    return items
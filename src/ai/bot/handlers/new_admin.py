@@ -15,7 +15,7 @@ from src.ai.bot.texts import admin_texts
 from src.ai.bot.handlers import new_admin_router
 from src.ai.bot.keyboards import admin_keyboards
 from src.ai.bot.states import admin_states
-from src.ai.helpers import make_excel_safe
+from src.ai.helpers import make_excel_safe, product_caption
 from src.ai.webapp_client import webapp_client
 from src.tg_methods import get_user_id_by_phone, normalize_phone, get_user_id_by_username
 
@@ -32,7 +32,7 @@ async def handle_deep_start(message: Message, command: CommandObject, state: FSM
             bts = await result.content.read()
         url = f"{WEBAPP_BASE_DOMAIN}/#/product/{product_id}"
         print(url)
-        await message.answer_photo(photo=BufferedInputFile(file=bts, filename=f'{product_id}.png'), caption=f"<b>{product.name}</b>\nАртикул: {product.code}", reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Подробнее", web_app=WebAppInfo(url=url))]]))
+        await message.answer_photo(photo=BufferedInputFile(file=bts, filename=f'{product_id}.png'), caption=product_caption(product), reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Подробнее", web_app=WebAppInfo(url=url))]]))
 
 @new_admin_router.message(CommandStart())
 async def handle_start(message: Message, state: FSMContext):
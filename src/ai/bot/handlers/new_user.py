@@ -13,7 +13,7 @@ from aiogram.types import FSInputFile, Message, CallbackQuery, ReplyKeyboardRemo
 from config import OWNER_TG_IDS, UFA_TZ, DATA_DIR, PROFESSOR_ASSISTANT_ID, NEW_ASSISTANT_ID, BOT_KEYWORDS, WEBAPP_BASE_DOMAIN, INTERNAL_API_TOKEN
 from src.ai.bot.handlers.new_user_helpers import _get_unverified_requests_count, _request_phone, _ensure_user
 from src.ai.calc import generate_drug_graphs, plot_filled_scale
-from src.ai.helpers import CHAT_NOT_BANNED_FILTER, _notify_user, with_typing, _fmt, check_blocked
+from src.ai.helpers import CHAT_NOT_BANNED_FILTER, _notify_user, with_typing, _fmt, check_blocked, product_caption
 from src.ai.webapp_client import webapp_client
 from src.tg_methods import normalize_phone
 from src.ai.bot.texts import user_texts
@@ -73,7 +73,7 @@ async def handle_deep_start(message: Message, command: CommandObject):
 
         url = f"{WEBAPP_BASE_DOMAIN}/#/product/{product_id}"
         print(url)
-        await message.answer_photo(photo=BufferedInputFile(file=bts, filename=f'{product_id}.png'), caption=f"<b>{product.name}</b>\nАртикул: {product.code}", reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Подробнее", web_app=WebAppInfo(url=url))]]))
+        await message.answer_photo(photo=BufferedInputFile(file=bts, filename=f'{product_id}.png'), caption=product_caption(product), reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="Подробнее", web_app=WebAppInfo(url=url))]]))
 
 
 @new_user_router.message(CommandStart())
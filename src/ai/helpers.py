@@ -6,6 +6,7 @@ import random
 from datetime import datetime
 from functools import wraps
 from logging import Logger
+from typing import Any
 
 import pandas as pd
 from aiogram import Bot
@@ -17,6 +18,13 @@ from src.ai.bot.texts import user_texts
 from src.ai.webapp_client import WebappBotApiError, webapp_client
 
 MAX_TG_MSG_LEN = 4096
+MAX_TG_CAPTION_LEN = 1024
+
+
+def product_caption(product: Any) -> str:
+    """The pre-rendered card when it fits in a photo caption, otherwise the short name + code caption."""
+    if getattr(product, "tg_card", None) and len(product.tg_card_text or "") <= MAX_TG_CAPTION_LEN: return product.tg_card
+    return f"<b>{product.name}</b>\nАртикул: {product.code}"
 
 
 def with_typing(func):
@@ -0,0 +1,110 @@
+import random
+
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.helpers import normalize
+from src.webapp.crud.product_listing import refresh_product_listings
+from src.webapp.models import Cart, CartItem, Category, Feature, Product, PromoCode, TgCategory, Unit, User
+from src.webapp.models.product_tg_categories import product_tg_categories
+
+INSERT_BATCH_SIZE = 1000
+
+BRANDS = ["Солгар", "Эвалар", "Доппельгерц", "Now Foods", "Витрум", "Компливит", "Алфавит", "Супрадин", "Магне", "Аквадетрим", "Nature's Bounty", "Solgar", "Jarrow", "Life Extension", "Мультитабс", "Оригинал"]
+SUBSTANCES = ["Витамин D3", "Витамин C", "Витамин B12", "Витамин E", "Омега-3", "Магний B6", "Цинк", "Железо хелат", "Кальций D3", "Коэнзим Q10", "Фолиевая кислота", "Биотин", "Коллаген", "Глюкозамин хондроитин", "Мелатонин", "Куркумин", "Пробиотик", "Лютеин", "Селен", "Йод", "Л-карнитин", "Гиалуроновая кислота", "Рыбий жир", "Мультивитамины"]
+QUALIFIERS = ["", "", "форте", "актив", "плюс", "комплекс", "для женщин", "для мужчин", "детский", "био", "макс", "хелат"]
+FORMS = ["капсулы", "таблетки", "жевательные таблетки", "порошок", "капли", "сироп", "гель", "саше"]
+DOSES = ["100 мг", "250 мг", "500 мг", "1000 мг", "400 МЕ", "2000 МЕ", "5000 МЕ", "50 мкг"]
+PACKS = ["№30", "№60", "№90", "№120", "№180", "100 мл", "200 г"]
+TG_CATEGORIES = ["Витамины", "Минералы", "Омега", "Для сердца", "Для суставов", "Для сна", "Иммунитет", "Красота", "Спорт", "Детям", "Беременным", "Пищеварение", "Антиоксиданты", "Энергия", "Печень", "Зрение", "Нервная система", "Кости", "Мужское здоровье", "Женское здоровье", "Хиты", "Новинки", "Акции", "Веган", "Без глютена", "Премиум", "Эконом", "Подарки", "Наборы", "Прочее"]
+FIRST_NAMES = ["Александр", "Мария", "Дмитрий", "Анна", "Сергей", "Елена", "Иван", "Ольга", "Максим", "Наталья", "Артём", "Татьяна", "Павел", "Юлия", "", ""]
+LAST_NAMES = ["Иванов", "Смирнова", "Кузнецов", "Попова", "Васильев", "Петрова", "Соколов", "Михайлова", "Новиков", "Фёдорова", "Морозов", "Волкова", "", ""]
+
+
+def _product_name(rng: random.Random) -> str:
+    parts = [rng.choice(BRANDS), rng.choice(SUBSTANCES), rng.choice(QUALIFIERS), rng.choice(DOSES), rng.choice(FORMS), rng.choice(PACKS)]
+    return " ".join(p for p in parts if p)[:96]
+
+def _balance(rng: random.Random, stock_profile: str) -> int:
+    if stock_profile == "out" or (stock_profile == "partial" and rng.random() < 0.5): return 0
+    # Long tail: most in-stock features hold a handful of units, a few hold hundreds
+    return min(int(rng.expovariate(1 / 12)) + 1, 900)
+
+def _features(rng: random.Random, product_onec_id: str, index: int) -> list[dict[str, Any]]:
+    if rng.random() < 0.02: return []
+    stock_profile = rng.choices(["in", "partial", "out"], weights=[55, 25, 20])[0]
+    base = Decimal(rng.randrange(150, 9000, 10))
+    features = []
+    for n in range(rng.choices([1, 2, 3, 4], weights=[50, 30, 15, 5])[0]):
+        pack = PACKS[n % len(PACKS)]
+        features.append({"onec_id": f"bench-f-{index}-{n}", "product_onec_id": product_onec_id, "name": pack, "code": f"F{index:07d}{n}", "price": base * (n + 1), "balance": _balance(rng, stock_profile)})
+
+    return features
+
+def _phone(rng: random.Random, used: set[str]) -> str:
+    while True:
+        digits = f"9{rng.randrange(10 ** 9):09d}"
+        if digits not in used:
+            used.add(digits)
+            return rng.choice([f"+7{digits}", f"+7 {digits[:3]} {digits[3:6]}-{digits[6:8]}-{digits[8:]}", f"8{digits}"])
+
+async def _insert_batches(db: AsyncSession, table, rows: list[dict[str, Any]]) -> None:
+    for i in range(0, len(rows), INSERT_BATCH_SIZE): await db.execute(insert(table), rows[i: i + INSERT_BATCH_SIZE])
+
+async def seed_catalog(db: AsyncSession, products: int, users: int | None = None, seed: int = 42) -> dict[str, int]:
+    """
+    Fills an empty schema with a synthetic catalog of `products` products (plus features, tg categories and links)
+    and `users` users. Deterministic for a given seed. Returns the row counts per table.
+    """
+    rng = random.Random(seed)
+    users = users if users is not None else max(500, products // 2)
+
+    unit_rows = [{"onec_id": "bench-unit", "name": "шт"}]
+    category_rows = [{"onec_id": f"bench-c-{i}", "unit_onec_id": "bench-unit", "name": name, "code": f"C{i:03d}"} for i, name in enumerate(SUBSTANCES)]
+    tg_category_rows = [{"id": i + 1, "name": name} for i, name in enumerate(TG_CATEGORIES)]
+
+    product_rows, feature_rows, link_rows = [], [], []
+    for i in range(products):
+        onec_id = f"bench-p-{i}"
+        name = _product_name(rng)
+        product_rows.append({"onec_id": onec_id, "name": name, "code": f"P{i:07d}", "description": None, "category_onec_id": rng.choice(category_rows)["onec_id"], "search_name": await normalize(name)})
+        feature_rows.extend(_features(rng, onec_id, i))
+        for tg_category_id in rng.sample(range(1, len(TG_CATEGORIES) + 1), k=rng.choices([0, 1, 2, 3], weights=[20, 40, 30, 10])[0]): link_rows.append({"product_onec_id": onec_id, "tg_category_id": tg_category_id})
+
+    used_phones: set[str] = set()
+    user_rows = []
+    for i in range(users):
+        user_rows.append({"tg_id": 100_000_000 + rng.randrange(7_000_000_000), "name": rng.choice(FIRST_NAMES) or None, "surname": rng.choice(LAST_NAMES) or None, "phone": _phone(rng, used_phones) if rng.random() < 0.6 else None, "tg_phone": _phone(rng, used_phones) if rng.random() < 0.8 else None, "email": f"bench{i}@example.com" if rng.random() < 0.3 else None})
+    user_rows = list({row["tg_id"]: row for row in user_rows}.values())
+
+    await _insert_batches(db, Unit.__table__, unit_rows)
+    await _insert_batches(db, Category.__table__, category_rows)
+    await _insert_batches(db, TgCategory.__table__, tg_category_rows)
+    await _insert_batches(db, Product.__table__, product_rows)
+    await _insert_batches(db, Feature.__table__, feature_rows)
+    await _insert_batches(db, product_tg_categories, link_rows)
+    await _insert_batches(db, User.__table__, user_rows)
+    await refresh_product_listings(db)
+    await db.commit()
+    return {"products": len(product_rows), "features": len(feature_rows), "tg_categories": len(tg_category_rows), "product_tg_categories": len(link_rows), "users": len(user_rows)}
+
+async def seed_orders(db: AsyncSession, carts: int, promos: int = 20, seed: int = 42) -> dict[str, int]:
+    """Adds promo codes and `carts` carts with 1-5 items over the already seeded users and features."""
+    rng = random.Random(seed)
+    user_ids = (await db.execute(select(User.tg_id))).scalars().all()
+    features = (await db.execute(select(Feature.onec_id, Feature.product_onec_id, Feature.price))).all()
+    promo_rows = [{"code": f"BENCH{i:03d}", "owner_name": rng.choice(LAST_NAMES) or "Владелец", "discount_pct": Decimal(rng.choice([5, 10, 15]))} for i in range(promos)]
+    cart_rows, item_rows = [], []
+    for cart_id in range(1, carts + 1):
+        picked = rng.sample(features, k=min(len(features), rng.randint(1, 5)))
+        cart_rows.append({"id": cart_id, "user_id": rng.choice(user_ids), "name": f"Заказ #{cart_id}", "phone": "+79000000000", "email": "bench@example.com", "sum": sum((f.price for f in picked), Decimal(0)), "promo_code": rng.choice(promo_rows)["code"] if rng.random() < 0.3 else None})
+        item_rows.extend({"cart_id": cart_id, "product_onec_id": f.product_onec_id, "feature_onec_id": f.onec_id, "quantity": rng.randint(1, 3)} for f in picked)
+
+    await _insert_batches(db, PromoCode.__table__, promo_rows)
+    await _insert_batches(db, Cart.__table__, cart_rows)
+    await _insert_batches(db, CartItem.__table__, item_rows)
+    await db.commit()
+    return {"promo_codes": len(promo_rows), "carts": len(cart_rows), "cart_items": len(item_rows)}
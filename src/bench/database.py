@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import event, text
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from config import ASYNC_DATABASE_URL, BENCH_DATABASE_URL
+from src.webapp.database import Base
+
+
+class QueryCounter:
+    """Counts statements sent to the database (one per cursor execute, i.e. per round trip)."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.count = 0
+        self.statements: list[str] = []
+        self.keep_statements = False
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.count += 1
+        if self.keep_statements: self.statements.append(statement)
+
+    @contextmanager
+    def measure(self, keep_statements: bool = False) -> Iterator["QueryCounter"]:
+        """Resets the counter for the duration of the block; `count` holds the block's round trips afterwards."""
+        self.count = 0
+        self.statements = []
+        self.keep_statements = keep_statements
+        try: yield self
+        finally: self.keep_statements = False
+
+
+def bench_engine() -> AsyncEngine:
+    """
+    Engine for BENCH_DATABASE_URL. Refuses to run without it or against the application database,
+    because every bench drops and recreates the schema.
+    """
+    if not BENCH_DATABASE_URL: raise RuntimeError("BENCH_DATABASE_URL is not set; point it at a scratch Postgres database")
+    url = make_url(BENCH_DATABASE_URL)
+    app_url = make_url(ASYNC_DATABASE_URL)
+    if (url.host, url.port or 5432, url.database) == (app_url.host, app_url.port or 5432, app_url.database): raise RuntimeError("BENCH_DATABASE_URL points at the application database")
+    return create_async_engine(url, echo=False, pool_size=2, max_overflow=0)
+
+def bench_sessionmaker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]: return async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+async def reset_schema(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+async def analyze(engine: AsyncEngine) -> None:
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
@@ -0,0 +1,59 @@
+import math
+import time
+
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from src.bench.database import QueryCounter
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; `values` does not need to be sorted."""
+    if not values: return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class BenchResult:
+    suite: str
+    size: int
+    case: str
+    timings_ms: list[float] = field(default_factory=list)
+    round_trips: list[int] = field(default_factory=list)
+
+    @property
+    def p50(self) -> float: return percentile(self.timings_ms, 50)
+
+    @property
+    def p95(self) -> float: return percentile(self.timings_ms, 95)
+
+    @property
+    def trips(self) -> float: return sum(self.round_trips) / len(self.round_trips) if self.round_trips else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"suite": self.suite, "size": self.size, "case": self.case, "runs": len(self.timings_ms), "p50_ms": round(self.p50, 3), "p95_ms": round(self.p95, 3), "round_trips": round(self.trips, 2)}
+
+
+async def measure(result: BenchResult, counter: QueryCounter, call: Callable[[], Awaitable[Any]], repeat: int, before: Callable[[], None] | None = None) -> BenchResult:
+    """Runs `call` `repeat` times, recording wall time and DB round trips of each run. `before` runs untimed ahead of every call."""
+    for _ in range(repeat):
+        if before is not None: before()
+        with counter.measure():
+            started = time.perf_counter()
+            await call()
+            result.timings_ms.append((time.perf_counter() - started) * 1000)
+        result.round_trips.append(counter.count)
+
+    return result
+
+def print_table(results: list[BenchResult]) -> None: print_rows([r.as_dict() for r in results])
+
+def print_rows(rows: list[dict[str, Any]]) -> None:
+    if not rows: return
+    headers = list(rows[0])
+    widths = {h: max(len(h), *(len(str(row[h])) for row in rows)) for h in headers}
+    print("  ".join(h.ljust(widths[h]) for h in headers))
+    print("  ".join("-" * widths[h] for h in headers))
+    for row in rows: print("  ".join(str(row[h]).ljust(widths[h]) for h in headers))
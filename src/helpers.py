@@ -25,7 +25,6 @@ from fastapi import HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy import BigInteger, Integer, String, DateTime, Numeric, Boolean, select, distinct, func, desc, case
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 from transliterate import translit
 
@@ -342,6 +341,11 @@ def normalize_html_for_telegram(raw_html: str) -> str:
     return text.strip()
 
 
+def telegram_html_to_text(tg_html: str) -> str:
+    """Plain text of normalize_html_for_telegram output, for places without parse_mode='HTML' (inline descriptions, logs)."""
+    return html.unescape(re.sub(r"<[^>]+>", "", tg_html))
+
+
 async def _notify_user(message: Message, text: str, timer: float | None = None, logger: Logger = None) -> None:
     if logger: logger.info("Notify user %s | text_preview=%r | timer=%s", message.from_user.id, text[:100], timer)
     x = await message.answer(text, parse_mode="HTML")
@@ -658,18 +662,9 @@ async def cart_analysis_text(db: AsyncSession, cart_id: int) -> str:
     cart_id -> human/Telegram-friendly analysis text.
     Loads: cart.items -> (product + feature), cart.user, cart.promo, product.tg_categories.
     """
-    stmt = (
-        select(Cart)
-        .where(Cart.id == cart_id)
-        .options(
-            selectinload(Cart.items)
-            .selectinload(CartItem.product)
-            .selectinload(Product.tg_categories),
-            selectinload(Cart.items).selectinload(CartItem.feature),
-            selectinload(Cart.user),
-            joinedload(Cart.promo),
-            )
-    )
+    from src.webapp.crud.loading import CART_DETAIL_WITH_USER
+
+    stmt = select(Cart).where(Cart.id == cart_id).options(*CART_DETAIL_WITH_USER)
 
     cart: Optional[Cart] = (await db.execute(stmt)).scalars().first()
     if not cart:
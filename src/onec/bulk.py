@@ -0,0 +1,76 @@
+"""
+Upserts of 1C rows keyed by a unique column.
+
+Small sets go through multi-row INSERT ... ON CONFLICT statements of UPSERT_BATCH_SIZE rows. From COPY_THRESHOLD rows on
+the rows are COPYed (asyncpg copy_records_to_table) into a temp staging table that lives until the commit and merged
+with one INSERT ... SELECT ... ON CONFLICT, skipping the SQLAlchemy compile and bind step per chunk.
+Both only rewrite a row when one of the update columns IS DISTINCT FROM what is stored.
+
+Rows that leave the feed are not deleted (carts reference them) but soft-deleted: deactivate_missing clears is_active on
+every active row whose key is not among the fetched ones, in one UPDATE against the unnested key array.
+"""
+from typing import Any
+
+from sqlalchemy import Table, bindparam, column, func, select, table as table_clause, text, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import ENTERPRISE_COPY_THRESHOLD
+
+UPSERT_BATCH_SIZE = 500
+COPY_THRESHOLD = ENTERPRISE_COPY_THRESHOLD
+
+
+def _on_conflict(stmt, table: Table, conflict_cols: list[str], update_cols: list[str]):
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[c] for c in conflict_cols],
+        set_={c: stmt.excluded[c] for c in update_cols},
+        where=tuple_(*(table.c[c] for c in update_cols)).is_distinct_from(tuple_(*(stmt.excluded[c] for c in update_cols))),
+    )
+
+async def values_upsert(db: AsyncSession, table: Table, rows: list[dict[str, Any]], conflict_cols: list[str], update_cols: list[str]) -> int:
+    written = 0
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        written += (await db.execute(_on_conflict(pg_insert(table).values(rows[i : i + UPSERT_BATCH_SIZE]), table, conflict_cols, update_cols))).rowcount
+    return written
+
+async def copy_upsert(db: AsyncSession, table: Table, rows: list[dict[str, Any]], conflict_cols: list[str], update_cols: list[str]) -> int:
+    """Runs in the session's transaction: the staging table is created through the session first, which opens it on the driver connection."""
+    columns = list(dict.fromkeys([*conflict_cols, *update_cols]))
+    stage = f"stage_{table.name}"
+    await db.execute(text(f"DROP TABLE IF EXISTS {stage}"))
+    # Same column types as the target, no constraints or indexes to maintain while loading
+    await db.execute(text(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {table.name} WITH NO DATA"))
+
+    raw = await (await db.connection()).get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(stage, records=[tuple(row.get(c) for c in columns) for row in rows], columns=columns)
+
+    source = table_clause(stage, *(column(c) for c in columns))
+    written = (await db.execute(_on_conflict(pg_insert(table).from_select(columns, select(*source.c)), table, conflict_cols, update_cols))).rowcount
+    await db.execute(text(f"DROP TABLE {stage}"))
+    return written
+
+async def upsert_rows(db: AsyncSession, table: Table, rows: list[dict[str, Any]], conflict_cols: list[str], update_cols: list[str]) -> int:
+    """
+    Upserts `rows` into `table` without committing, through COPY once there are COPY_THRESHOLD of them.
+    Returns the rows inserted or changed (skipped no-op updates do not count).
+    """
+    if not rows: return 0
+    if COPY_THRESHOLD and len(rows) >= COPY_THRESHOLD: return await copy_upsert(db, table, rows, conflict_cols, update_cols)
+    return await values_upsert(db, table, rows, conflict_cols, update_cols)
+
+def _missing(table: Table, key: str, keys: list[str]):
+    # One array parameter however many keys were fetched, instead of an IN list bound row by row
+    fetched = select(func.unnest(bindparam("fetched_keys", keys, type_=ARRAY(table.c[key].type))))
+    return table.c.is_active & table.c[key].not_in(fetched)
+
+async def count_missing(db: AsyncSession, table: Table, key: str, keys: list[str]) -> tuple[int, int]:
+    """(active rows, active rows deactivate_missing would deactivate)."""
+    active, missing = (await db.execute(select(func.count(), func.count().filter(_missing(table, key, keys))).select_from(table).where(table.c.is_active))).one()
+    return active, missing
+
+async def deactivate_missing(db: AsyncSession, table: Table, key: str, keys: list[str], returning: str | None = None) -> list[Any]:
+    """Sets is_active = false on the active rows of `table` whose `key` is not in `keys`, without committing. Returns their `returning` column (the key by default)."""
+    result = await db.execute(update(table).where(_missing(table, key, keys)).values(is_active=False).returning(table.c[returning or key]))
+    return list(result.scalars())
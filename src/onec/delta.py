@@ -0,0 +1,84 @@
+import hashlib
+import json
+import time
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import Table, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# The in-memory hashes are re-read from the DB this often, so rows edited outside the sync (admin CRUD) get overwritten again
+RESEED_INTERVAL = 6 * 3600
+
+
+def _plain(value: Any) -> Any:
+    # Numeric(10, 2) comes back as 1500.50 and Integer as 5, the 1C feed gives Decimal("1500.5") and Decimal("5")
+    if isinstance(value, (Decimal, int)) and not isinstance(value, bool): return str(Decimal(value).normalize())
+    return value
+
+def row_hash(row: dict[str, Any], columns: list[str]) -> str:
+    payload = json.dumps([_plain(row.get(c)) for c in columns], ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass(slots=True)
+class TableDelta:
+    table: str
+    rows: list[dict[str, Any]] = field(default_factory=list)    # added + changed, what _upsert_table gets
+    hashes: dict[str, str] = field(default_factory=dict)
+    vanished_keys: set[str] = field(default_factory=set)
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+
+    @property
+    def vanished(self) -> int: return len(self.vanished_keys)
+
+    def __str__(self) -> str: return f"{self.table} +{self.added} ~{self.changed} ={self.unchanged} -{self.vanished}"
+
+
+class RowHashes:
+    """
+    Content hash per table and key of every row the sync knows to be in the DB. A fetch is diffed against it so only
+    new and changed rows are upserted; the hashes advance only after the sync commits.
+    """
+
+    def __init__(self):
+        self._hashes: dict[str, dict[str, str]] = {}
+        self._seeded_at: float | None = None
+
+    def stale(self) -> bool: return self._seeded_at is None or time.monotonic() - self._seeded_at > RESEED_INTERVAL
+
+    def reset(self) -> None: self._seeded_at = None
+
+    async def seed(self, db: AsyncSession, tables: list[tuple[Table, str, list[str]]]) -> None:
+        """Re-reads the hashes of (table, key column, hashed columns) from the DB."""
+        hashes = {}
+        for table, key, columns in tables:
+            result = await db.execute(select(table.c[key], *(table.c[c] for c in columns)))
+            hashes[table.name] = {row[key]: row_hash(row, columns) for row in result.mappings()}
+
+        self._hashes, self._seeded_at = hashes, time.monotonic()
+
+    def diff(self, table: Table, rows: list[dict[str, Any]], key: str, columns: list[str]) -> TableDelta:
+        known = self._hashes.get(table.name, {})
+        delta = TableDelta(table.name)
+        for row in rows:
+            digest = row_hash(row, columns)
+            delta.hashes[row[key]] = digest
+            previous = known.get(row[key])
+            if previous == digest: delta.unchanged += 1
+            else:
+                delta.rows.append(row)
+                if previous is None: delta.added += 1
+                else: delta.changed += 1
+
+        delta.vanished_keys = known.keys() - delta.hashes.keys()
+        return delta
+
+    def advance(self, deltas: list[TableDelta]) -> None:
+        # Rows that left the feed are forgotten (and so reported once): the sync deactivates them, and should they come back
+        # they are upserted as new, which sets is_active again
+        for delta in deltas: self._hashes[delta.table] = dict(delta.hashes)
@@ -1,6 +1,31 @@
-PRICES = "InformationRegister_ЦеныНоменклатуры?$filter=ВидЦен_Key eq guid'23800556-4ed9-11f0-887d-fa163eccf8af'"
-UNITS = "Catalog_КлассификаторЕдиницИзмерения"
-CATEGORIES = "Catalog_КатегорииНоменклатуры"
-FEATURES = "Catalog_ХарактеристикиНоменклатуры"
-PRODUCTS = "Catalog_Номенклатура"
-BALANCES = "InformationRegister_ОстаткиТоваров"
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Feed:
+    """An OData entity set plus the fields the sync reads from it ($select) and an optional $filter / $orderby."""
+    entity: str
+    select: tuple[str, ...]
+    filter: str | None = None
+    order_by: str | None = None
+
+    def url(self, top: int | None = None, skip: int = 0, json: bool = False, count: bool = False) -> str:
+        """`count` asks for the total of the filtered set ($inlinecount, OData v3) along with the page."""
+        params = [f"$select={','.join(self.select)}"]
+        if self.filter: params.append(f"$filter={self.filter}")
+        if self.order_by: params.append(f"$orderby={self.order_by}")
+        if top is not None: params.append(f"$top={top}")
+        if skip: params.append(f"$skip={skip}")
+        if count: params.append("$inlinecount=allpages")
+        if json: params.append("$format=json")
+        return f"{self.entity}?{'&'.join(params)}"
+
+
+# Paged feeds need a total $orderby or concurrent $top/$skip pages overlap or skip records: catalogs by their unique Ref_Key,
+# registers by their dimensions (plus Period for the periodic price register)
+PRICES = Feed("InformationRegister_ЦеныНоменклатуры", ("Period", "Номенклатура_Key", "Характеристика_Key", "Цена"), filter="ВидЦен_Key eq guid'23800556-4ed9-11f0-887d-fa163eccf8af'", order_by="Номенклатура_Key,Характеристика_Key,Period")
+UNITS = Feed("Catalog_КлассификаторЕдиницИзмерения", ("Ref_Key", "Description", "НаименованиеПолное", "DeletionMark"), order_by="Ref_Key")
+CATEGORIES = Feed("Catalog_КатегорииНоменклатуры", ("Ref_Key", "ЕдиницаИзмерения_Key", "Description", "Code", "DeletionMark"), order_by="Ref_Key")
+FEATURES = Feed("Catalog_ХарактеристикиНоменклатуры", ("Ref_Key", "Owner", "Description", "Code", "ФайлКартинки_Key", "DeletionMark"), order_by="Ref_Key")
+PRODUCTS = Feed("Catalog_Номенклатура", ("Ref_Key", "Parent_Key", "КатегорияНоменклатуры_Key", "ТипНоменклатуры", "Недействителен", "DeletionMark", "Description", "Code", "Комментарий", "ДополнительныеРеквизиты"), order_by="Ref_Key")
+BALANCES = Feed("InformationRegister_ОстаткиТоваров", ("Номенклатура_Key", "Характеристика_Key", "Количество"), order_by="Номенклатура_Key,Характеристика_Key")
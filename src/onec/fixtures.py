@@ -0,0 +1,152 @@
+"""
+Recorded 1C OData responses, for re-running a sync without the 1C server.
+
+A recording is a directory in ONEC_FIXTURES_DIR: one gzip file per response body plus manifest.json, which maps every
+request (path and query relative to the base URL) to its file and keeps when and with which paging it was recorded.
+RecordingTransport and ReplayTransport plug into OneCEnterprise's httpx client (the `transport` argument).
+
+    python -m src.onec.fixtures record [--label NAME]    # fetch every feed from ENTERPRISE_URL once and store it
+    python -m src.onec.fixtures list
+
+Replays need the ENTERPRISE_PAGE_SIZE and ENTERPRISE_ODATA_FORMAT of the recording, since both are part of the URLs.
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+from config import ENTERPRISE_ODATA_FORMAT, ENTERPRISE_PAGE_SIZE, ENTERPRISE_URL, ONEC_FIXTURES_DIR
+
+GZIP_LEVEL = 6
+
+
+class FixtureMissing(LookupError):
+    """The replayed sync asked for a request the recording does not have."""
+
+
+class Recording:
+    def __init__(self, path: Path, manifest: dict[str, Any]):
+        self.path = path
+        self.manifest = manifest
+        self._bodies: dict[str, bytes] = {}
+        self._base_path = urlsplit(manifest["base_url"]).path
+
+    @property
+    def name(self) -> str: return self.path.name
+
+    @property
+    def base_url(self) -> str: return self.manifest["base_url"]
+
+    @classmethod
+    def create(cls, label: str | None = None, base_url: str = ENTERPRISE_URL) -> "Recording":
+        recorded_at = datetime.now(timezone.utc)
+        path = ONEC_FIXTURES_DIR / (label or recorded_at.strftime("%Y%m%d-%H%M%S"))
+        path.mkdir(parents=True, exist_ok=False)
+        return cls(path, {"recorded_at": recorded_at.isoformat(), "base_url": base_url, "page_size": ENTERPRISE_PAGE_SIZE, "odata_format": ENTERPRISE_ODATA_FORMAT, "responses": {}})
+
+    @classmethod
+    def open(cls, label: str) -> "Recording":
+        """By name in ONEC_FIXTURES_DIR, "latest", or a path to a recording directory."""
+        if label == "latest":
+            manifest = max(ONEC_FIXTURES_DIR.glob("*/manifest.json"), key=lambda p: p.stat().st_mtime, default=None)
+            if manifest is None: raise FileNotFoundError(f"No recordings in {ONEC_FIXTURES_DIR}")
+            path = manifest.parent
+        else: path = Path(label) if Path(label).is_dir() else ONEC_FIXTURES_DIR / label
+        return cls(path, json.loads((path / "manifest.json").read_text(encoding="utf-8")))
+
+    def check_compatible(self) -> None:
+        if (self.manifest["page_size"], self.manifest["odata_format"]) != (ENTERPRISE_PAGE_SIZE, ENTERPRISE_ODATA_FORMAT):
+            raise ValueError(f"{self.name} was recorded with ENTERPRISE_PAGE_SIZE={self.manifest['page_size']} ENTERPRISE_ODATA_FORMAT={self.manifest['odata_format']}, "
+                             f"current settings are {ENTERPRISE_PAGE_SIZE} / {ENTERPRISE_ODATA_FORMAT}")
+
+    def key(self, url: httpx.URL) -> str:
+        target = unquote(url.raw_path.decode("ascii"))
+        return target[len(self._base_path):] if target.startswith(self._base_path) else target
+
+    def put(self, key: str, content_type: str, body: bytes) -> None:
+        name = f"{hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()}.gz"
+        (self.path / name).write_bytes(gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0))
+        self.manifest["responses"][key] = {"file": name, "content_type": content_type, "bytes": len(body), "fetched_at": datetime.now(timezone.utc).isoformat()}
+
+    def get(self, key: str) -> tuple[str, bytes]:
+        entry = self.manifest["responses"].get(key)
+        if entry is None: raise FixtureMissing(f"{self.name} has no response for {key}")
+        if key not in self._bodies: self._bodies[key] = gzip.decompress((self.path / entry["file"]).read_bytes())
+        return entry["content_type"], self._bodies[key]
+
+    def preload(self) -> int:
+        """Decompresses every body into memory, so replays time the sync and not the disk. Returns the total bytes."""
+        return sum(len(self.get(key)[1]) for key in self.manifest["responses"])
+
+    def save(self) -> None:
+        tmp = self.path / ".manifest.json.tmp"
+        tmp.write_text(json.dumps(self.manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path / "manifest.json")
+
+    def __str__(self) -> str:
+        responses = self.manifest["responses"].values()
+        return f"{self.name}: {len(responses)} responses, {sum(r['bytes'] for r in responses) / 1024 / 1024:.1f} MiB, recorded {self.manifest['recorded_at']}"
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to the network and stores every successful response body in the recording."""
+
+    def __init__(self, recording: Recording, transport: httpx.AsyncBaseTransport | None = None):
+        self.recording = recording
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        try: body = await response.aread()
+        finally: await response.aclose()
+
+        content_type = response.headers.get("content-type", "")
+        if response.is_success: self.recording.put(self.recording.key(request.url), content_type, body)
+        return httpx.Response(response.status_code, headers={"content-type": content_type}, content=body, request=request)
+
+    async def aclose(self) -> None: await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Answers every request from the recording; one it does not have raises FixtureMissing instead of being retried."""
+
+    def __init__(self, recording: Recording):
+        self.recording = recording
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        content_type, body = self.recording.get(self.recording.key(request.url))
+        return httpx.Response(200, headers={"content-type": content_type}, content=body, request=request)
+
+
+async def record(label: str | None = None) -> Recording:
+    from src.onec.main import OneCEnterprise
+    recording = Recording.create(label)
+    enterprise = OneCEnterprise(transport=RecordingTransport(recording))
+    try: await asyncio.gather(enterprise.get_products_1c(), enterprise.get_features_1c(), enterprise.get_categories_1c(), enterprise.get_units_1c())
+    finally:
+        recording.save()
+        await enterprise.close()
+
+    return recording
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("record").add_argument("--label", help="Directory name, the UTC time by default")
+    commands.add_parser("list")
+    args = parser.parse_args()
+    if args.command == "record": print(asyncio.run(record(args.label)))
+    else:
+        for manifest in sorted(ONEC_FIXTURES_DIR.glob("*/manifest.json")): print(Recording.open(str(manifest.parent)))
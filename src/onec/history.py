@@ -0,0 +1,167 @@
+"""
+What every 1C sync run did: seconds per stage, per OData feed the records, pages, bytes and retries, per table the delta
+and the rows written. The last SYNC_HISTORY_SIZE runs are kept newest first in a ring buffer persisted to SYNC_HISTORY_FILE,
+so the webapp (/internal/bot/sync_status) and the admin bot (/sync_status) see the worker's runs from their own processes.
+"""
+import html
+import json
+import logging
+import os
+import time
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from config import SYNC_HISTORY_FILE, SYNC_HISTORY_SIZE
+from src.onec.integrity import summarize
+from src.onec.stages import SyncStages
+
+HISTORY_RELOAD_INTERVAL = 5.0
+
+
+@dataclass(slots=True)
+class FeedStats:
+    records: int = 0
+    pages: int = 0
+    bytes: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    total: int | None = None     # what 1C counted for the feed ($inlinecount), None if the publication did not say
+    complete: bool = False       # records matched that count
+
+
+@dataclass(slots=True)
+class TableStats:
+    fetched: int = 0
+    added: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    vanished: int = 0
+    written: int = 0     # rows the upsert inserted or actually changed
+    deactivated: int = 0     # rows soft-deleted because they left the feed (products and features only)
+
+
+@dataclass(slots=True)
+class SyncRun:
+    kind: str            # full (update_db) or stock (update_stock)
+    started_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+    status: str = "running"
+    error: str | None = None
+    stages: SyncStages = field(default_factory=SyncStages)
+    feeds: dict[str, FeedStats] = field(default_factory=dict)
+    tables: dict[str, TableStats] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    integrity: dict[str, Any] = field(default_factory=dict)     # src/onec/integrity.py report of a full sync
+
+    def feed(self, entity: str) -> FeedStats: return self.feeds.setdefault(entity, FeedStats())
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "seconds": round((self.finished_at or time.time()) - self.started_at, 3),
+            "stages": self.stages.as_dict(),
+            "feeds": {entity: {**asdict(stats), "seconds": round(stats.seconds, 3)} for entity, stats in self.feeds.items()},
+            "tables": {name: asdict(stats) for name, stats in self.tables.items()},
+            "counters": dict(self.counters),
+            "integrity": self.integrity,
+        }
+
+
+# The run of the sync the current task belongs to; tasks started inside it (the feeds' gather) inherit it
+current_run: ContextVar[SyncRun | None] = ContextVar("current_run", default=None)
+
+def run_stats() -> SyncRun:
+    """The current run, or a throwaway one outside of tracked_run so callers never check."""
+    return current_run.get() or SyncRun("untracked")
+
+
+class SyncHistory:
+    """Newest first. With a path, written after every run and re-read by other processes at most HISTORY_RELOAD_INTERVAL late."""
+
+    def __init__(self, path: Path | None, size: int = SYNC_HISTORY_SIZE):
+        self.path = path
+        self._runs: deque[dict[str, Any]] = deque(maxlen=size)
+        self._mtime: int | None = None
+        self._checked_at = 0.0
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    def _reload(self) -> None:
+        now = time.monotonic()
+        if self.path is None or now - self._checked_at < HISTORY_RELOAD_INTERVAL: return
+        self._checked_at = now
+        try: mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError: return
+        if mtime == self._mtime: return
+
+        try: runs = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e: return self.log.warning(f"Sync history {self.path} unreadable, keeping the previous one: {e}")
+        self._runs, self._mtime = deque(runs, maxlen=self._runs.maxlen), mtime
+
+    def record(self, run: SyncRun) -> None:
+        self._checked_at = 0.0
+        self._reload()
+        self._runs.appendleft(run.as_dict())
+        if self.path is None: return
+        try:
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            tmp.write_text(json.dumps(list(self._runs), ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._mtime = self.path.stat().st_mtime_ns
+        except OSError as e: self.log.warning(f"Could not write sync history {self.path}: {e}")
+
+    def runs(self, limit: int | None = None, kind: str | None = None) -> list[dict[str, Any]]:
+        self._reload()
+        runs = [run for run in self._runs if kind is None or run["kind"] == kind]
+        return runs[:limit] if limit is not None else runs
+
+    def last_success(self) -> dict[str, float]:
+        """kind -> finished_at of its latest run that did not fail."""
+        latest: dict[str, float] = {}
+        for run in self.runs():
+            if run["status"] != "failed": latest.setdefault(run["kind"], run["finished_at"])
+        return latest
+
+
+@contextmanager
+def tracked_run(kind: str, history: SyncHistory | None) -> Iterator[SyncRun]:
+    run = SyncRun(kind)
+    token = current_run.set(run)
+    try: yield run
+    except BaseException as e:
+        run.status, run.error = "failed", f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        current_run.reset(token)
+        run.finished_at = time.time()
+        if run.status == "running": run.status = "ok"
+        if history is not None: history.record(run)
+
+def describe(run: dict[str, Any], detailed: bool = False) -> str:
+    """A run from SyncHistory.runs() as Telegram HTML."""
+    started = time.strftime("%d.%m %H:%M:%S", time.localtime(run["started_at"]))
+    icon = {"ok": "✅", "unchanged": "💤", "failed": "❌"}.get(run["status"], "⏳")
+    written = sum(t["written"] for t in run["tables"].values())
+    megabytes = sum(f["bytes"] for f in run["feeds"].values()) / 1024 / 1024
+    retries = sum(f["retries"] for f in run["feeds"].values())
+    lines = [f"{icon} <b>{run['kind']}</b> {started}: {run['seconds']:.1f}s, {megabytes:.1f} MiB, {retries} retries, {written} rows written"]
+    if run["error"]: lines.append(f"<code>{html.escape(run['error'])}</code>")
+    if not detailed: return "\n".join(lines)
+
+    lines.append("⏱️ " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in run["stages"].items()))
+    for entity, f in run["feeds"].items(): lines.append(f"📥 {entity}: {f['records']} records, {f['pages']} pages, {f['bytes'] / 1024:.0f} KiB, {f['retries']} retries, {f['seconds']:.1f}s")
+    for name, t in run["tables"].items(): lines.append(f"🧮 {name}: +{t['added']} ~{t['changed']} ={t['unchanged']} -{t['vanished']}, written {t['written']}, deactivated {t.get('deactivated', 0)}")
+    if run["counters"]: lines.append("📋 " + ", ".join(f"{name} {value}" for name, value in run["counters"].items()))
+    if integrity := run.get("integrity"): lines.append(f"🔎 {html.escape(summarize(integrity))}")
+    return "\n".join(lines)
+
+
+sync_history = SyncHistory(SYNC_HISTORY_FILE)
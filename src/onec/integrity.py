@@ -0,0 +1,66 @@
+"""
+Post-sync verification of the tables the 1C sync writes: exact row counts with an md5 checksum of the synced columns
+(ordered by key, so a replay of the same recording always yields the same checksums) and the active ones among them, active
+products without active features or without an active priced feature, and the planner's row estimates for every other table. Reads only the catalog tables, never carts or usage.
+
+    python -m src.onec.integrity                         # the report for the application DB
+    python -m src.onec.integrity --dump products units   # full row dump of these tables to the debug log, on demand only
+"""
+import argparse
+import asyncio
+import json
+import logging
+
+from typing import Any
+
+from sqlalchemy import Table, Text, cast, exists, func, literal_column, null, select, text, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def integrity_report(db: AsyncSession, tables: list[tuple[Table, str, list[str]]]) -> dict[str, Any]:
+    """`tables` as (table, key column, synced columns)."""
+    from src.webapp.models import Feature, Product
+    report: dict[str, Any] = {"tables": {}}
+    for table, key, columns in tables:
+        row_text = func.md5(cast(tuple_(table.c[key], *(table.c[c] for c in columns)), Text))
+        active = func.count().filter(table.c.is_active) if "is_active" in table.c else null()
+        count, active, checksum = (await db.execute(select(func.count(), active, func.md5(func.string_agg(row_text, aggregate_order_by(literal_column("''"), table.c[key])))).select_from(table))).one()
+        report["tables"][table.name] = {"rows": count, "active": active, "checksum": checksum}
+
+    has_feature = exists().where(Feature.product_onec_id == Product.onec_id, Feature.is_active)
+    has_price = exists().where(Feature.product_onec_id == Product.onec_id, Feature.is_active, Feature.price > 0)
+    report["products_without_features"] = await db.scalar(select(func.count()).select_from(Product).where(Product.is_active, ~has_feature))
+    report["products_without_price"] = await db.scalar(select(func.count()).select_from(Product).where(Product.is_active, has_feature, ~has_price))
+    report["features_without_price"] = await db.scalar(select(func.count()).select_from(Feature).where(Feature.is_active, func.coalesce(Feature.price, 0) <= 0))
+
+    synced = {table.name for table, _, _ in tables}
+    estimates = await db.execute(text("SELECT relname, n_live_tup FROM pg_stat_user_tables WHERE schemaname = 'public' ORDER BY relname"))
+    report["estimated_rows"] = {name: rows for name, rows in estimates.all() if name not in synced}
+    return report
+
+def _table_summary(name: str, t: dict[str, Any]) -> str:
+    active = "" if t.get("active") is None else f"/{t['active']} active"
+    return f"{name} {t['rows']}{active} ({t['checksum'][:8] if t['checksum'] else '-'})"
+
+def summarize(report: dict[str, Any]) -> str:
+    tables = ", ".join(_table_summary(name, t) for name, t in report["tables"].items())
+    return f"{tables}; active products without features {report['products_without_features']}, without price {report['products_without_price']}; features without price {report['features_without_price']}"
+
+
+async def _main(dump: list[str] | None) -> None:
+    from src.onec.main import SYNCED_COLUMNS
+    from src.webapp import get_session
+    from src.webapp.database import Base, get_db_items
+    if dump is not None: return await get_db_items(logging.getLogger("dump"), dump or None)
+
+    async with get_session() as db: report = await integrity_report(db, [(Base.metadata.tables[name], "onec_id", columns) for name, columns in SYNCED_COLUMNS.items()])
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dump", nargs="*", metavar="TABLE", help="Dump every row of these tables (all tables without names) to the debug log")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.dump is not None else logging.INFO)
+    asyncio.run(_main(args.dump))
@@ -1,23 +1,44 @@
 import asyncio
 import json
 import logging
+import time
 import xml.etree.ElementTree as ET
 import aiofiles
 import httpx
 
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Literal
-from sqlalchemy.dialects.postgresql import insert as pg_insert
+from typing import Any, AsyncIterator, Literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import ENTERPRISE_URL, ENTERPRISE_LOGIN, ENTERPRISE_PASSWORD
+from config import ENTERPRISE_URL, ENTERPRISE_LOGIN, ENTERPRISE_PASSWORD, ENTERPRISE_PAGE_SIZE, ENTERPRISE_PAGE_CONCURRENCY, ENTERPRISE_ODATA_FORMAT
 from src.onec import endpoints, keywords
-from src.webapp import get_session
-from src.webapp.database import get_db_items
-
-UPSERT_BATCH_SIZE = 500
+from src.onec.bulk import count_missing, deactivate_missing, upsert_rows
+from src.onec.delta import RowHashes
+from src.onec.history import FeedStats, SyncHistory, SyncRun, TableStats, run_stats, sync_history, tracked_run
+from src.onec.integrity import integrity_report, summarize
+from src.webapp import catalog, get_session
+from src.webapp.crud.feature import update_feature_stock
+from src.webapp.crud.product_card import refresh_product_cards
+from src.webapp.crud.product_listing import refresh_product_listings
+from src.webapp.search_index import search_index
+from src.webapp.snapshot import catalog_snapshot
+
+FETCH_ATTEMPTS = 3
+STREAM_CHUNK_SIZE = 64 * 1024
+MAX_CONNECTIONS = 20
 SLEEP_INTERVAL = 900          
+STOCK_SLEEP_INTERVAL = 60
+PRICE_QUANT = Decimal("0.01")
+# A complete feed missing more than this share of the active rows is rather a broken 1C filter than a delisting; deactivation is skipped then
+DEACTIVATE_MAX_SHARE = 0.5
+# Columns update_db writes per table, besides the onec_id key; also what the delta hashes and the integrity report checksums
+SYNCED_COLUMNS = {
+    "units": ["name", "description"],
+    "categories": ["unit_onec_id", "name", "code"],
+    "products": ["category_onec_id", "name", "search_name", "code", "description", "usage", "expiration", "is_active"],
+    "features": ["product_onec_id", "name", "code", "file_id", "price", "balance", "is_active"],
+}
 
 
 def _dec(v: Any, default: str = "0") -> Decimal:
@@ -30,6 +51,11 @@ def _dec(v: Any, default: str = "0") -> Decimal:
     except Exception: return Decimal(default)
 
 
+def _sellable_balance(v: Any) -> Decimal:
+    # Three units of every feature stay in reserve and are never offered in the shop
+    return _dec(int(v) - 3 if int(v) >= 3 else 0)
+
+
 class OneCEnterprise:
     TG_NOT_SOLD_PROP_KEY = "87cfc3b4-defa-11f0-8b75-fa163eccf8af"
     PARENT_KEY = "63d865c8-5fad-11f0-818d-fa163eccf8af"
@@ -51,68 +77,166 @@ class OneCEnterprise:
 
     NS = {"m": "http://schemas.microsoft.com/ado/2007/08/dataservices/metadata", "d": "http://schemas.microsoft.com/ado/2007/08/dataservices", "atom": "http://www.w3.org/2005/Atom"}
 
-    def __init__(self, url=ENTERPRISE_URL, username=ENTERPRISE_LOGIN, password=ENTERPRISE_PASSWORD):
-        limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
-        self.__client = httpx.AsyncClient(auth=(username, password), limits=limits, timeout=httpx.Timeout(30.0))
+    def __init__(self, url=ENTERPRISE_URL, username=ENTERPRISE_LOGIN, password=ENTERPRISE_PASSWORD, transport: httpx.AsyncBaseTransport | None = None, session_factory=get_session, history: SyncHistory | None = sync_history):
+        """
+        `transport` swaps the network for src/onec/fixtures.py recording or replay, `session_factory` the application DB
+        for a bench one, `history` is where the runs of update_db and update_stock are recorded.
+        """
+        limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=10)
+        self.__client = httpx.AsyncClient(auth=(username, password), limits=limits, timeout=httpx.Timeout(30.0), transport=transport)
+        # Page requests of all feeds queue here rather than in the pool, whose 30s pool timeout would fail them
+        self.__slots = asyncio.Semaphore(MAX_CONNECTIONS)
+        self.__row_hashes = RowHashes()
+        # The full sync and the stock fast lane both write features; never interleave their transactions
+        self.__write_lock = asyncio.Lock()
         self.__url = url
+        self.__session_factory = session_factory
+        self.history = history
         self.log = logging.getLogger(self.__class__.__name__)
 
-    async def __fetch_odata(self, endpoint: str, save: bool = False) -> list[dict[str, Any]]:
-        url = f"{self.__url}{endpoint}"
-        response = None
+    @classmethod
+    def _entry_record(cls, entry: ET.Element) -> dict[str, Any] | None:
+        content = entry.find("atom:content/m:properties", cls.NS)
+        if content is None: return None
+
+        record: dict[str, Any] = {}
+        for elem in content:
+            tag = elem.tag.split("}", 1)[1] if "}" in elem.tag else elem.tag
+            if tag == "ДополнительныеРеквизиты":
+                extras = []
+                for extra in elem.findall("d:element", cls.NS):
+                    extra_record = {sub.tag.split("}", 1)[1]: sub.text for sub in extra}
+                    extras.append(extra_record)
+                record[tag] = extras
+
+            else: record[tag] = elem.text
+
+        return record
+
+    async def __stream_entries(self, url: str, stats: FeedStats, meta: dict[str, Any]) -> AsyncIterator[dict[str, Any]]:
+        """
+        Parses the Atom feed chunk by chunk as it downloads, dropping every entry from the tree once it is yielded.
+        The feed's m:count ($inlinecount) goes to meta["count"].
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        entry_tag = f"{{{self.NS['atom']}}}entry"
+        count_tag = f"{{{self.NS['m']}}}count"
+        root: ET.Element | None = None
+        stages = run_stats().stages
+        waited = time.perf_counter()
+        async with self.__client.stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                parsing = time.perf_counter()
+                stages.add("fetch", parsing - waited)
+                stats.bytes += len(chunk)
+                records = []
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        if root is None: root = elem
+                        continue
+                    if elem.tag == count_tag and elem.text: meta["count"] = int(elem.text)
+                    if elem.tag != entry_tag: continue
+
+                    record = self._entry_record(elem)
+                    root.remove(elem)
+                    if record is not None: records.append(record)
+
+                stages.add("parse", time.perf_counter() - parsing)
+                # The consumer's time between chunks is not the download's
+                for record in records: yield record
+                waited = time.perf_counter()
+
+        parser.close()
 
-        for attempt in range(3):
+    @classmethod
+    def _json_value(cls, value: Any) -> Any:
+        """A $format=json value as the Atom feed would have it: text for scalars, None for empty strings."""
+        if isinstance(value, bool): return "true" if value else "false"
+        if isinstance(value, list): return [{k: cls._json_value(v) for k, v in item.items()} if isinstance(item, dict) else cls._json_value(item) for item in value]
+        return value if value != "" else None
+
+    async def __fetch_json(self, url: str, stats: FeedStats, meta: dict[str, Any]) -> list[dict[str, Any]]:
+        stages = run_stats().stages
+        with stages.measure("fetch"):
+            response = await self.__client.get(url)
+            response.raise_for_status()
+        stats.bytes += len(response.content)
+        with stages.measure("parse"):
+            # Numbers stay the literal text 1C sent, like in the XML feed
+            payload = json.loads(response.content, parse_float=str, parse_int=str)
+            if "odata.count" in payload: meta["count"] = int(payload["odata.count"])
+            return [{k: self._json_value(v) for k, v in item.items() if "@" not in k and not k.startswith("odata.")} for item in payload["value"]]
+
+    async def __fetch_page(self, feed: endpoints.Feed, skip: int, count: bool = False) -> tuple[list[dict[str, Any]], int | None]:
+        """The records from `skip` on (ENTERPRISE_PAGE_SIZE at most) and, with `count`, the feed's total if 1C reports it."""
+        url = f"{self.__url}{feed.url(top=ENTERPRISE_PAGE_SIZE, skip=skip, json=ENTERPRISE_ODATA_FORMAT == 'json', count=count)}"
+        stats = run_stats().feed(feed.entity)
+        for attempt in range(FETCH_ATTEMPTS):
+            meta: dict[str, Any] = {}
             try:
-                response = await self.__client.get(url)
-                response.raise_for_status()
-                if response.status_code == httpx.codes.OK: break
-            except Exception as e:
+                async with self.__slots:
+                    if ENTERPRISE_ODATA_FORMAT == "json": records = await self.__fetch_json(url, stats, meta)
+                    else: records = [record async for record in self.__stream_entries(url, stats, meta)]
+                return records, meta.get("count")
+            except (httpx.HTTPError, ET.ParseError, ValueError, KeyError) as e:
+                if attempt == FETCH_ATTEMPTS - 1: raise RuntimeError(f"❌ Failed to fetch {url} after {FETCH_ATTEMPTS} attempts") from e
+                stats.retries += 1
                 self.log.warning(f"⚠️ Attempt {attempt + 1} failed for {url}: {e}")
                 await asyncio.sleep(3)
 
-        if not response: raise RuntimeError(f"❌ Failed to fetch {url} after 3 attempts")
-        root = ET.fromstring(response.content)
-        entries: list[dict[str, Any]] = []
-
-        for entry in root.findall("atom:entry", self.NS):
-            content = entry.find("atom:content/m:properties", self.NS)
-            if content is None: continue
-
-            record: dict[str, Any] = {}
-            for elem in content:
-                tag = elem.tag.split("}", 1)[1] if "}" in elem.tag else elem.tag
-                if tag == "ДополнительныеРеквизиты":
-                    extras = []
-                    for extra in elem.findall("d:element", self.NS):
-                        extra_record = {sub.tag.split("}", 1)[1]: sub.text for sub in extra}
-                        extras.append(extra_record)
-                    record[tag] = extras
-
-                else:record[tag] = elem.text
-
-            entries.append(record)
-
+    async def __iter_odata(self, feed: endpoints.Feed, save: bool = False) -> AsyncIterator[dict[str, Any]]:
+        """
+        Yields the records of an OData feed page by page ($top/$skip, only the $select-ed fields). The first page is fetched
+        alone together with the feed's $inlinecount total, so small feeds cost one request; after it, ENTERPRISE_PAGE_CONCURRENCY
+        pages at a time. A publication may cap $top below ENTERPRISE_PAGE_SIZE, so pages step by what the first one returned
+        and the end is the total, or an empty page when 1C gives none; a page coming back short proves nothing.
+        Every page is retried on its own and yielded only once complete, so a retry never repeats records. Raises once the
+        feed is read if the records do not add up to the total; FeedStats.complete tells the caller the total was confirmed.
+        """
+        started = time.perf_counter()
+        saved: list[dict[str, Any]] = []
+        first, total = await self.__fetch_page(feed, 0, count=True)
+        step = len(first) or ENTERPRISE_PAGE_SIZE
+        pages, records, next_page = 1, 0, 1
+        batch = [first]
+        while batch:
+            for page in batch:
+                records += len(page)
+                if save: saved.extend(page)
+                for record in page: yield record
+
+            if (total is not None and records >= total) or any(not page for page in batch): break
+            window = range(next_page, next_page + ENTERPRISE_PAGE_CONCURRENCY)
+            if total is not None: window = range(next_page, min(window.stop, -(-total // step)))
+            batch = [page for page, _ in await asyncio.gather(*(self.__fetch_page(feed, n * step) for n in window))]
+            pages, next_page = pages + len(window), window.stop
+
+        stats = run_stats().feed(feed.entity)
+        stats.records, stats.pages, stats.seconds = stats.records + records, stats.pages + pages, stats.seconds + time.perf_counter() - started
+        # Changed under the paging (rows added or deleted between two requests) or cut off by the publication
+        if total is not None and records != total: raise RuntimeError(f"❌ {feed.entity}: fetched {records} records, 1C counts {total}")
+        stats.total, stats.complete = total, total is not None
+        if total is None: self.log.warning(f"⚠️ {feed.entity}: 1C sent no $inlinecount, completeness of the feed unconfirmed")
+        self.log.info(f"📥 {feed.entity}: {records} records in {pages} pages, {stats.bytes / 1024:.0f} KiB, {stats.retries} retries, {time.perf_counter() - started:.1f}s")
         if save:
-            fname = f"{endpoint.split('?')[0]}.json"
-            async with aiofiles.open(fname, "w", encoding="utf-8") as f: await f.write(json.dumps(entries, ensure_ascii=False, indent=4))
+            fname = f"{feed.entity}.json"
+            async with aiofiles.open(fname, "w", encoding="utf-8") as f: await f.write(json.dumps(saved, ensure_ascii=False, indent=4))
             self.log.info(f"🧾 Saved {fname}")
 
-        return entries
-
     async def get_units_1c(self, save: bool = False) -> dict[str, dict[str, Any]]:
-        units = await self.__fetch_odata(endpoints.UNITS, save)
         return {
             u.get("Ref_Key"): {
                 "onec_id": u.get("Ref_Key"),
                 "name": u.get("Description"),
                 "description": u.get("НаименованиеПолное"),
             }
-            for u in units
+            async for u in self.__iter_odata(endpoints.UNITS, save)
             if u.get("DeletionMark") not in [True, "true"]
         }
 
     async def get_categories_1c(self, save: bool = False) -> dict[str, dict[str, Any]]:
-        cats = await self.__fetch_odata(endpoints.CATEGORIES, save)
         return {
             c.get("Ref_Key"): {
                 "onec_id": c.get("Ref_Key"),
@@ -124,15 +248,13 @@ class OneCEnterprise:
                 "name": c.get("Description", "Без категории"),
                 "code": c.get("Code"),
             }
-            for c in cats
+            async for c in self.__iter_odata(endpoints.CATEGORIES, save)
             if c.get("DeletionMark") not in [True, "true"]
         }
 
     async def get_prices_1c(self, save: bool = False) -> dict[str, dict[str, Any]]:
-        prices = await self.__fetch_odata(endpoints.PRICES, save)
         latest: dict[tuple[str, str], dict[str, Any]] = {}
-
-        for entry in prices:
+        async for entry in self.__iter_odata(endpoints.PRICES, save):
             key = (entry["Номенклатура_Key"], entry["Характеристика_Key"])
             entry_period = datetime.fromisoformat(entry["Period"])
             if key not in latest or entry_period > datetime.fromisoformat(latest[key]["Period"]):
@@ -148,18 +270,17 @@ class OneCEnterprise:
         }
 
     async def get_balances_1c(self, save: bool = False) -> dict[str, dict[str, Any]]:
-        balances = await self.__fetch_odata(endpoints.BALANCES, save)
         return {
             f"{b['Номенклатура_Key']}_{b['Характеристика_Key']}": {
                 "product_onec_id": b["Номенклатура_Key"],
                 "feature_onec_id": b["Характеристика_Key"],
                 "balance": b["Количество"],
             }
-            for b in balances
+            async for b in self.__iter_odata(endpoints.BALANCES, save)
         }
 
     async def get_features_1c(self, save: bool = False) -> dict[str, dict[str, Any]]:
-        features_task = self.__fetch_odata(endpoints.FEATURES, save)
+        features_task = self.__get_feature_refs_1c(save)
         prices_task = self.get_prices_1c(save)
         balances_task = self.get_balances_1c(save)
 
@@ -167,6 +288,14 @@ class OneCEnterprise:
             features_task, prices_task, balances_task
         )
 
+        for f in features.values():
+            key = f"{f['product_onec_id']}_{f['onec_id']}"
+            f["price"] = prices_map.get(key, {}).get("price", "0")
+            f["balance"] = balances_map.get(key, {}).get("balance", "0")
+
+        return features
+
+    async def __get_feature_refs_1c(self, save: bool = False) -> dict[str, dict[str, Any]]:
         return {
             f.get("Ref_Key"): {
                 "onec_id": f.get("Ref_Key"),
@@ -174,18 +303,14 @@ class OneCEnterprise:
                 "name": f.get("Description"),
                 "code": f.get("Code"),
                 "file_id": f.get("ФайлКартинки_Key", None),
-                "price": prices_map.get(f"{f.get('Owner')}_{f.get('Ref_Key')}", {}).get("price", "0"),
-                "balance": balances_map.get(f"{f.get('Owner')}_{f.get('Ref_Key')}", {}).get("balance", "0"),
             }
-            for f in features
+            async for f in self.__iter_odata(endpoints.FEATURES, save)
             if f.get("DeletionMark") not in [True, "true"]
         }
 
     async def get_products_1c(self, save: bool = False) -> dict[str, dict[str, Any]]:
-        products = await self.__fetch_odata(endpoints.PRODUCTS, save)
-
         out: dict[str, dict[str, Any]] = {}
-        for p in products:
+        async for p in self.__iter_odata(endpoints.PRODUCTS, save):
             if not p.get("КатегорияНоменклатуры_Key"): continue
             if p.get("Недействителен") == "true": continue
             if p.get("DeletionMark") in [True, "true"]: continue
@@ -208,15 +333,36 @@ class OneCEnterprise:
         return out
 
     @staticmethod
-    async def _upsert_table(db: AsyncSession, table, rows: list[dict[str, Any]], conflict_cols: list[str], update_cols: list[str]) -> None:
-        if not rows: return
-        for i in range(0, len(rows), UPSERT_BATCH_SIZE):
-            chunk = rows[i : i + UPSERT_BATCH_SIZE]
-            stmt = pg_insert(table).values(chunk)
-            stmt = stmt.on_conflict_do_update(index_elements=[getattr(table.c, c) for c in conflict_cols], set_={c: getattr(stmt.excluded, c) for c in update_cols})
-            await db.execute(stmt)
+    async def _upsert_table(db: AsyncSession, table, rows: list[dict[str, Any]], conflict_cols: list[str], update_cols: list[str]) -> int:
+        return await upsert_rows(db, table, rows, conflict_cols, update_cols)
+
+    async def __deactivate_missing(self, db: AsyncSession, run: SyncRun, table, rows: list[dict[str, Any]], feeds: list[endpoints.Feed], returning: str = "onec_id") -> list[str]:
+        """
+        Soft-deletes the active rows of `table` that are not in this fetch; returns their `returning` column.
+        Only when every feed the rows come from was confirmed complete against 1C's count: rows missing from a feed cut
+        short look exactly like delisted ones, whatever their share.
+        """
+        unconfirmed = [feed.entity for feed in feeds if not (run.feeds.get(feed.entity) or FeedStats()).complete]
+        if unconfirmed:
+            self.log.warning(f"⚠️ {table.name}: {', '.join(unconfirmed)} not confirmed complete by 1C; nothing deactivated")
+            return []
+
+        keys = [row["onec_id"] for row in rows]
+        active, missing = await count_missing(db, table, "onec_id", keys)
+        if not missing: return []
+        if missing > active * DEACTIVATE_MAX_SHARE:
+            self.log.warning(f"⚠️ {table.name}: {missing} of {active} active rows missing from 1C, more than {DEACTIVATE_MAX_SHARE:.0%}; left active")
+            return []
+
+        gone = await deactivate_missing(db, table, "onec_id", keys, returning)
+        run.tables[table.name].deactivated = len(gone)
+        self.log.info(f"🗑️ {table.name}: {len(gone)} rows gone from 1C deactivated")
+        return gone
 
     async def update_db(self, approach: Literal["json", "postgres"], save: bool = False) -> None:
+        with tracked_run("full" if approach == "postgres" else "export", self.history) as run: await self.__update_db(run, approach, save)
+
+    async def __update_db(self, run: SyncRun, approach: Literal["json", "postgres"], save: bool = False) -> None:
         products_task = self.get_products_1c(save)
         features_task = self.get_features_1c(save)
         categories_task = self.get_categories_1c(save)
@@ -238,20 +384,100 @@ class OneCEnterprise:
             self.log.info("✅ JSON export completed.")
             return
 
+        from src.helpers import normalize
         from src.webapp.models import Unit, Category, Product, Feature
+        transforming = time.perf_counter()
         unit_rows = [{"onec_id": u["onec_id"], "name": u.get("name") or "", "description": u.get("description")} for u in units.values() if u.get("onec_id")]
         category_rows = [{"onec_id": c["onec_id"], "unit_onec_id": c.get("unit_onec_id"), "name": c.get("name") or "", "code": c.get("code")} for c in categories.values() if c.get("onec_id")]
-        product_rows = [{"onec_id": p["onec_id"], "category_onec_id": p.get("category_onec_id"), "name": p.get("name") or "", "code": p.get("code"), "description": p.get("description"), "usage": p.get("usage"), "expiration": p.get("expiration")} for p in products.values() if p.get("onec_id")]
-        feature_rows = [{"onec_id": f["onec_id"], "product_onec_id": f.get("product_onec_id"), "name": f.get("name") or "", "code": f.get("code"), "file_id": f.get("file_id"), "price": _dec(f.get("price")), "balance": _dec(int(f.get("balance")) - 3 if int(f.get("balance")) >= 3 else 0)} for f in features.values() if f.get("onec_id")]
+        product_rows = [{"onec_id": p["onec_id"], "category_onec_id": p.get("category_onec_id"), "name": p.get("name") or "", "search_name": await normalize(p.get("name") or ""), "code": p.get("code"), "description": p.get("description"), "usage": p.get("usage"), "expiration": p.get("expiration"), "is_active": True} for p in products.values() if p.get("onec_id")]
+        feature_rows = [{"onec_id": f["onec_id"], "product_onec_id": f.get("product_onec_id"), "name": f.get("name") or "", "code": f.get("code"), "file_id": f.get("file_id"), "price": _dec(f.get("price")), "balance": _sellable_balance(f.get("balance")), "is_active": True} for f in features.values() if f.get("onec_id")]
 
         self.log.info(f"🔁 UPSERT: units={len(unit_rows)} categories={len(category_rows)} products={len(product_rows)} features={len(feature_rows)}")
 
-        async with get_session() as db:
-            await self._upsert_table(db, Unit.__table__, unit_rows, ["onec_id"], ["name", "description"])
-            await self._upsert_table(db, Category.__table__, category_rows, ["onec_id"], ["unit_onec_id", "name", "code"])
-            await self._upsert_table(db, Product.__table__, product_rows, ["onec_id"], ["category_onec_id", "name", "code", "description", "usage", "expiration"])
-            await self._upsert_table(db, Feature.__table__, feature_rows, ["onec_id"], ["product_onec_id", "name", "code", "file_id", "price", "balance"])
-            await db.commit()
+        # (table, rows, update columns) in FK order
+        tables = [(model.__table__, rows, SYNCED_COLUMNS[model.__tablename__]) for model, rows in ((Unit, unit_rows), (Category, category_rows), (Product, product_rows), (Feature, feature_rows))]
+        run.stages.add("transform", time.perf_counter() - transforming)
+
+        async with self.__write_lock, self.__session_factory() as db:
+            with run.stages.measure("transform"):
+                if self.__row_hashes.stale(): await self.__row_hashes.seed(db, [(table, "onec_id", columns) for table, _, columns in tables])
+                deltas = [self.__row_hashes.diff(table, rows, "onec_id", columns) for table, rows, columns in tables]
+            self.log.info(f"🧮 Delta: {'; '.join(map(str, deltas))}")
+            for (_, rows, _), delta in zip(tables, deltas): run.tables[delta.table] = TableStats(fetched=len(rows), added=delta.added, changed=delta.changed, unchanged=delta.unchanged, vanished=delta.vanished)
+            try:
+                with run.stages.measure("upsert"):
+                    for (table, _, columns), delta in zip(tables, deltas): run.tables[delta.table].written = await self._upsert_table(db, table, delta.rows, ["onec_id"], columns)
+                    # Onto the full fetch, not the delta: also catches rows that left the feed while the worker was down
+                    deactivated = set(await self.__deactivate_missing(db, run, Product.__table__, product_rows, [endpoints.PRODUCTS]))
+                    # Features are kept only for the fetched products, so a short product feed would shorten theirs too
+                    deactivated |= set(await self.__deactivate_missing(db, run, Feature.__table__, feature_rows, [endpoints.FEATURES, endpoints.PRODUCTS], "product_onec_id"))
+                _, _, product_delta, feature_delta = deltas
+                touched = {row["onec_id"] for row in product_delta.rows} | {row["product_onec_id"] for row in feature_delta.rows} | deactivated
+                with run.stages.measure("refresh"):
+                    # Listings in full (a feature may have moved to another product); the statement only writes rows that differ
+                    listings = await refresh_product_listings(db) if touched else 0
+                    cards = await refresh_product_cards(db, touched) if touched else 0
+                with run.stages.measure("upsert"): await db.commit()
+            except Exception:
+                self.__row_hashes.reset()
+                raise
+
+            self.__row_hashes.advance(deltas)
+            run.counters.update(listings=listings, cards=cards)
+            if any(delta.rows for delta in deltas) or deactivated:
+                self.log.info(f"📋 Product listings refreshed: {listings} changed, Telegram cards re-rendered: {cards}")
+                catalog.bump()
+                with run.stages.measure("refresh"):
+                    await search_index.rebuild(db)
+                    await catalog_snapshot.rebuild(db)
+
+            else:
+                run.status = "unchanged"
+                self.log.info("💤 Nothing changed in 1C, catalog left as is")
+
+            with run.stages.measure("verify"): run.integrity = await integrity_report(db, [(table, "onec_id", columns) for table, _, columns in tables])
+            self.log.info(f"🔎 Integrity: {summarize(run.integrity)}")
+
+        self.log.info(f"⏱️ Sync stages: {run.stages}; {time.time() - run.started_at:.1f}s in total")
+
+    async def update_stock(self) -> int:
+        """
+        Fast lane: fetches only the price and balance registers and writes them onto the features already in the DB
+        (new features, everything descriptive and deactivation wait for update_db). Returns the number of features changed.
+        """
+        with tracked_run("stock", self.history) as run: return await self.__update_stock(run)
+
+    async def __update_stock(self, run: SyncRun) -> int:
+        from sqlalchemy import select
+        from src.webapp.models import Feature
+        prices, balances = await asyncio.gather(self.get_prices_1c(), self.get_balances_1c())
+        async with self.__write_lock, self.__session_factory() as db:
+            with run.stages.measure("transform"):
+                stock, known = [], 0
+                for onec_id, product_onec_id, price, balance in (await db.execute(select(Feature.onec_id, Feature.product_onec_id, Feature.price, Feature.balance).where(Feature.is_active))).all():
+                    known += 1
+                    key = f"{product_onec_id}_{onec_id}"
+                    new_price = _dec(prices.get(key, {}).get("price", "0")).quantize(PRICE_QUANT)
+                    new_balance = int(_sellable_balance(balances.get(key, {}).get("balance", "0")))
+                    if new_price != price or new_balance != balance: stock.append((onec_id, new_price, new_balance))
+
+            run.tables[Feature.__tablename__] = TableStats(fetched=known, changed=len(stock), unchanged=known - len(stock), written=len(stock))
+            if not stock:
+                run.status = "unchanged"
+                return 0
+
+            with run.stages.measure("upsert"): touched = await update_feature_stock(db, stock)
+            with run.stages.measure("refresh"):
+                listings = await refresh_product_listings(db, touched)
+                cards = await refresh_product_cards(db, touched)
+            with run.stages.measure("upsert"): await db.commit()
+            run.counters.update(listings=listings, cards=cards)
+            # Publishes the new version to the webapp processes (src/webapp/catalog.py), whose index, snapshot and caches
+            # rebuild on their next read; rebuilding them here would only refresh this process's copies, under the write lock
+            version = catalog.bump()
+            self.log.info(f"⚡ Stock fast lane: {len(stock)} features changed across {len(touched)} products, listings {listings}, cards {cards}, catalog {version}")
+
+        return len(stock)
 
     @staticmethod
     async def _write_json(file, data):
@@ -263,9 +489,15 @@ class OneCEnterprise:
             try:
                 await self.update_db("postgres", False)
                 self.log.info("✅ PostgreSQL updated successfully (upsert).")
-                await get_db_items(self.log)
 
             except Exception as e: self.log.exception(f"❌ Worker failed: {e}")
             await asyncio.sleep(SLEEP_INTERVAL)
 
+    async def stock_worker(self):
+        """Prices and balances every STOCK_SLEEP_INTERVAL seconds, next to postgres_worker's full pass."""
+        while True:
+            try: await self.update_stock()
+            except Exception as e: self.log.exception(f"❌ Stock fast lane failed: {e}")
+            await asyncio.sleep(STOCK_SLEEP_INTERVAL)
+
     async def close(self): await self.__client.aclose()
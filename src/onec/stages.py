@@ -0,0 +1,28 @@
+import time
+
+from contextlib import contextmanager
+from typing import Iterator
+
+# fetch and parse add up across the concurrent page requests, so together they can exceed the wall time of the sync
+STAGES = ("fetch", "parse", "transform", "upsert", "refresh", "verify")
+
+
+class SyncStages:
+    """Seconds spent per stage of the current sync, reset at its start."""
+
+    def __init__(self):
+        self.seconds: dict[str, float] = dict.fromkeys(STAGES, 0.0)
+
+    def reset(self) -> None: self.seconds = dict.fromkeys(STAGES, 0.0)
+
+    def add(self, stage: str, seconds: float) -> None: self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try: yield
+        finally: self.add(stage, time.perf_counter() - started)
+
+    def as_dict(self) -> dict[str, float]: return {stage: round(seconds, 3) for stage, seconds in self.seconds.items()}
+
+    def __str__(self) -> str: return ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.seconds.items())
@@ -0,0 +1,84 @@
+"""
+The catalog version that ETags, the search caches, the search index and the snapshot are keyed on. It lives in
+CATALOG_VERSION_FILE rather than in memory: the webapp workers, the 1C worker and the admin bot all bump and read the
+same one, each process re-reading it at most VERSION_CHECK_INTERVAL late, and the local listeners fire for a bump
+made by any of them.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+
+from datetime import datetime, timezone
+from typing import Callable
+
+from config import CATALOG_VERSION_FILE
+
+VERSION_CHECK_INTERVAL = 1.0
+
+_version = ""
+_changed_at = datetime.now(timezone.utc)
+_mtime: int | None = None
+_checked_at: float | None = None
+_listeners: list[Callable[[], None]] = []
+log = logging.getLogger("catalog")
+
+
+def _notify() -> None:
+    for listener in _listeners: listener()
+
+def _write() -> None:
+    global _mtime
+    try:
+        tmp = CATALOG_VERSION_FILE.with_name(f".{CATALOG_VERSION_FILE.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"version": _version, "changed_at": _changed_at.isoformat()}), encoding="utf-8")
+        os.replace(tmp, CATALOG_VERSION_FILE)
+        _mtime = CATALOG_VERSION_FILE.stat().st_mtime_ns
+    except OSError as e: log.warning(f"Could not write {CATALOG_VERSION_FILE}, catalog version {_version} stays in this process: {e}")
+
+def _reload() -> None:
+    global _version, _changed_at, _mtime, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < VERSION_CHECK_INTERVAL: return
+    _checked_at = now
+    try: mtime = CATALOG_VERSION_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        # First process to look starts the version everyone else picks up
+        if _version: return
+        _version, _changed_at = uuid.uuid4().hex[:12], datetime.now(timezone.utc)
+        return _write()
+    if mtime == _mtime: return
+
+    try:
+        state = json.loads(CATALOG_VERSION_FILE.read_text(encoding="utf-8"))
+        version, changed_at = str(state["version"]), datetime.fromisoformat(state["changed_at"])
+    except (OSError, ValueError, KeyError) as e: return log.warning(f"Catalog version {CATALOG_VERSION_FILE} unreadable, keeping {_version or 'none'}: {e}")
+    _mtime = mtime
+    if version == _version: return
+    loaded = bool(_version)
+    _version, _changed_at = version, changed_at
+    if loaded: _notify()
+
+
+def version() -> str:
+    """Opaque catalog version: changes every time 1C data or admin categories change, in whichever process."""
+    _reload()
+    return _version
+
+def changed_at() -> datetime:
+    _reload()
+    return _changed_at
+
+def on_change(listener: Callable[[], None]) -> Callable[[], None]:
+    """`listener` runs on every bump, this process's own right away and other processes' once version() notices them."""
+    _listeners.append(listener)
+    return listener
+
+def bump() -> str:
+    """Call after the change is committed, so a process that sees the new version also sees the new rows."""
+    global _version, _changed_at, _checked_at
+    _version, _changed_at, _checked_at = uuid.uuid4().hex[:12], datetime.now(timezone.utc), time.monotonic()
+    _write()
+    _notify()
+    return _version
@@ -16,7 +16,7 @@ __all__ = [
     'create_product', 'get_product', 'get_products', 'update_product',
     'create_category', 'get_category', 'get_categories', 'update_category',
     'create_unit', 'get_unit', 'get_units', 'update_unit', 'get_user_carts_webapp', 'get_carts_by_date',
-    'create_feature', 'get_feature', 'get_features', 'update_feature', 'get_product_with_features',
+    'create_feature', 'get_feature', 'get_features', 'update_feature', 'get_product_with_features', 'get_products_with_features',
     'update_user', 'get_users', 'get_user', 'create_user', 'delete_user', 'update_user_name',
     'get_usages', 'write_usage', 'get_tg_refs', 'upsert_user', 'increment_tokens', 'get_user_usage_totals', 'get_user_total_requests',
     'delete_cart', 'get_cart_by_id', 'clear_cart', 'create_cart', 'get_cart_items', 'remove_cart_item', 'update_cart_item', 'update_cart',
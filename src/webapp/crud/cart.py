@@ -1,10 +1,11 @@
 from sqlalchemy import select, delete, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload
 from datetime import datetime, timezone, timedelta
 
 from config import UFA_TZ
-from src.webapp.models import CartItem, Product
+from src.webapp.crud.loading import CART_DETAIL, CART_DETAIL_WITH_USER
+from src.webapp.models import CartItem
 from src.webapp.models.cart import Cart
 from src.webapp.schemas.cart import CartCreate, CartUpdate
 from collections.abc import Sequence
@@ -29,7 +30,7 @@ async def get_carts_by_date(db: AsyncSession, dt: datetime) -> list[Cart]:
     return [c for c in carts if "ачальная" not in (c.name or "")]
 
 async def get_user_carts(db: AsyncSession, user_id: int, is_active: bool | None = None, exclude_starting: bool = True) -> Sequence[Cart]:
-    query = select(Cart).where(Cart.user_id == user_id).options(selectinload(Cart.items).selectinload(CartItem.product).selectinload(Product.tg_categories), selectinload(Cart.items).selectinload(CartItem.feature), joinedload(Cart.promo), selectinload(Cart.user))
+    query = select(Cart).where(Cart.user_id == user_id).options(*CART_DETAIL_WITH_USER)
     if is_active is not None: query = query.where(Cart.is_active.is_(is_active))
     query = query.order_by(Cart.created_at.desc())
     result = await db.execute(query)
@@ -62,7 +63,7 @@ async def clear_cart(db: AsyncSession, cart_id: int) -> None:
     await db.commit()
 
 async def get_user_carts_webapp(db: AsyncSession, user_id: int, is_active: bool | None = None, exclude_starting: bool = True,) -> Sequence[Cart]:
-    stmt = (select(Cart).where(Cart.user_id == user_id).options(selectinload(Cart.items).selectinload(CartItem.product).selectinload(Product.tg_categories), selectinload(Cart.items).selectinload(CartItem.feature), joinedload(Cart.promo)).order_by(Cart.created_at.desc()))
+    stmt = (select(Cart).where(Cart.user_id == user_id).options(*CART_DETAIL).order_by(Cart.created_at.desc()))
     if is_active is not None: stmt = stmt.where(Cart.is_active.is_(is_active))
     if exclude_starting: stmt = stmt.where(or_(Cart.name.is_(None), ~Cart.name.ilike("%ачальная%")))
     res = await db.execute(stmt)
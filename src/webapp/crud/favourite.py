@@ -21,7 +21,7 @@ async def get_user_favourite_by_onec(db: AsyncSession, fav_in: FavouriteBase,) -
 async def add_favourite(db: AsyncSession, fav_in: FavouriteCreate,) -> Favourite:
     existing = await get_user_favourite_by_onec(db, fav_in)
     if existing: return existing
-    product_result = await db.execute(select(Product).where(Product.onec_id == fav_in.onec_id))
+    product_result = await db.execute(select(Product).where(Product.onec_id == fav_in.onec_id, Product.is_active))
     product_exists = product_result.scalars().first()
     if not product_exists: raise ValueError(f"Product with onec_id={fav_in.onec_id} not found")
 
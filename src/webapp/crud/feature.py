@@ -1,13 +1,22 @@
 import logging
-from typing import Any
+from decimal import Decimal
+from typing import Any, Iterable
+
+from sqlalchemy import Integer, Numeric, String, column, tuple_, update, values
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from src.webapp import catalog
 from ..models import Feature, Product
+from .product_card import refresh_product_cards
+from .product_listing import refresh_product_listings
 from ..schemas import FeatureCreate, FeatureUpdate
 
+# Three bind parameters per row, well under asyncpg's 32767
+STOCK_UPDATE_BATCH_SIZE = 5000
+
 async def create_feature(db: AsyncSession, feature: FeatureCreate) -> Feature | None:
     """
     Creates or updates a feature.
@@ -45,9 +54,12 @@ async def create_feature(db: AsyncSession, feature: FeatureCreate) -> Feature |
         ).returning(Feature)
 
         result = await db.execute(stmt)
+        created = result.scalar_one_or_none()
+        await refresh_product_listings(db, [feature.product_onec_id])
+        await refresh_product_cards(db, [feature.product_onec_id])
         await db.commit()
+        catalog.bump()
 
-        created = result.scalar_one_or_none()
         if created: logging.debug(f"✅ Synced feature '{feature.name}' for product {feature.product_onec_id}")
         return created
 
@@ -70,10 +82,38 @@ async def update_feature(db: AsyncSession, feature_id: int, feature_data: Featur
     db_feature = result.scalars().first()
     if db_feature is None: return None
 
+    product_onec_ids = {db_feature.product_onec_id}
     for field, value in feature_data.dict().items():
         setattr(db_feature, field, value)
 
     db.add(db_feature)
+    await db.flush()
+    product_onec_ids.add(db_feature.product_onec_id)
+    await refresh_product_listings(db, product_onec_ids)
+    await refresh_product_cards(db, product_onec_ids)
     await db.commit()
+    catalog.bump()
     await db.refresh(db_feature)
     return db_feature
+
+async def update_feature_stock(db: AsyncSession, stock: Iterable[tuple[str, Decimal, int]]) -> set[str]:
+    """
+    Writes (onec_id, price, balance) onto existing features with one UPDATE ... FROM (VALUES ...), skipping rows that
+    already hold those values. Does not commit. Returns the product_onec_ids of the features that changed.
+    """
+    stock = list(stock)
+    if not stock: return set()
+
+    table = Feature.__table__
+    changed: set[str] = set()
+    for i in range(0, len(stock), STOCK_UPDATE_BATCH_SIZE):
+        rows = values(column("onec_id", String), column("price", Numeric(10, 2)), column("balance", Integer), name="stock").data(stock[i: i + STOCK_UPDATE_BATCH_SIZE])
+        stmt = (
+            update(table)
+            .where(table.c.onec_id == rows.c.onec_id, tuple_(table.c.price, table.c.balance).is_distinct_from(tuple_(rows.c.price, rows.c.balance)))
+            .values(price=rows.c.price, balance=rows.c.balance)
+            .returning(table.c.product_onec_id)
+        )
+        changed.update((await db.execute(stmt)).scalars())
+
+    return changed
@@ -0,0 +1,30 @@
+"""
+Loader options per use case. The large collections (Product.cart_items, Product.tg_categories, Feature.cart_items,
+TgCategory.products, PromoCode.carts) default to lazy="raise", so a read gets exactly the relationships its profile lists
+and touching anything else fails loudly instead of pulling whole tables.
+Catalog profiles load only active features and products (see Product.is_active); order history loads whatever it references.
+"""
+from sqlalchemy.orm import joinedload, selectinload, undefer
+
+from src.webapp.models import Cart, CartItem, Feature, Product, PromoCode, TgCategory
+
+# Product card / JSON / search results: the product and its features
+PRODUCT_CARD = (selectinload(Product.features.and_(Feature.is_active)),)
+# Bot views: the above plus the pre-rendered Telegram card (deferred columns, see crud/product_card.py)
+PRODUCT_TELEGRAM_CARD = (*PRODUCT_CARD, undefer(Product.tg_card), undefer(Product.tg_card_text))
+# Admin category management: the product's tg categories only
+PRODUCT_TG_CATEGORIES = (selectinload(Product.tg_categories),)
+PRODUCT_FULL = (selectinload(Product.features.and_(Feature.is_active)), selectinload(Product.tg_categories))
+
+# Orders as shown to the customer (CartWebRead) and in cart analysis
+CART_DETAIL = (
+    selectinload(Cart.items).selectinload(CartItem.product).selectinload(Product.tg_categories),
+    selectinload(Cart.items).selectinload(CartItem.feature),
+    joinedload(Cart.promo),
+)
+CART_DETAIL_WITH_USER = (*CART_DETAIL, selectinload(Cart.user))
+# Admin cart search: items, promo and owner, no tg categories
+CART_SUMMARY = (selectinload(Cart.items), joinedload(Cart.promo), selectinload(Cart.user))
+
+TG_CATEGORY_PRODUCTS = (selectinload(TgCategory.products.and_(Product.is_active)),)
+PROMO_CARTS = (selectinload(PromoCode.carts),)
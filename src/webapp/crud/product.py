@@ -4,27 +4,43 @@ from typing import Any
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
 
+from src.helpers import normalize
+from src.webapp import catalog
 from ..models.product import Product
+from .loading import PRODUCT_CARD, PRODUCT_TELEGRAM_CARD
+from .product_card import refresh_product_cards
+from .product_listing import refresh_product_listings
 from ..schemas import ProductUpdate
 from ..schemas.product import ProductCreate
 
 async def create_product(db: AsyncSession, product: ProductCreate) -> Product:
-    stmt = insert(Product).values(**product.model_dump())
-    stmt = stmt.on_conflict_do_update(index_elements=["onec_id"], set_={"name": stmt.excluded.name, "code": stmt.excluded.code, "description": stmt.excluded.description, "category_onec_id": stmt.excluded.category_onec_id})
+    stmt = insert(Product).values(**product.model_dump(), search_name=await normalize(product.name))
+    stmt = stmt.on_conflict_do_update(index_elements=["onec_id"], set_={"name": stmt.excluded.name, "search_name": stmt.excluded.search_name, "code": stmt.excluded.code, "description": stmt.excluded.description, "category_onec_id": stmt.excluded.category_onec_id})
     result = await db.execute(stmt)
+    await refresh_product_listings(db, [product.onec_id])
+    await refresh_product_cards(db, [product.onec_id])
     await db.commit()
+    catalog.bump()
     return result.scalar_one_or_none()
 
 async def get_products(db: AsyncSession) -> list[Product]:
     result = await db.execute(select(Product))
     return result.scalars().all()
 
-async def get_product_with_features(db: AsyncSession, onec_id: str) -> Product | None:
-    result = await db.execute(select(Product).options(selectinload(Product.features)).where(Product.onec_id == onec_id))
+async def get_product_with_features(db: AsyncSession, onec_id: str, with_card: bool = False) -> Product | None:
+    result = await db.execute(select(Product).options(*(PRODUCT_TELEGRAM_CARD if with_card else PRODUCT_CARD)).where(Product.onec_id == onec_id, Product.is_active))
     return result.scalars().first()
 
+async def get_products_with_features(db: AsyncSession, onec_ids: list[str]) -> list[Product]:
+    """One IN query for all ids (plus the features select); returned in the requested order, duplicates, unknown and inactive ids dropped."""
+    onec_ids = list(dict.fromkeys(onec_ids))
+    if not onec_ids: return []
+
+    result = await db.execute(select(Product).options(*PRODUCT_CARD).where(Product.onec_id.in_(onec_ids), Product.is_active))
+    by_id = {product.onec_id: product for product in result.scalars().all()}
+    return [by_id[onec_id] for onec_id in onec_ids if onec_id in by_id]
+
 async def get_product(db: AsyncSession, attr_name: str, value: Any) -> Product | None:
     if not hasattr(Product, attr_name): raise AttributeError(f"Product has no attribute '{attr_name}'")
     column = getattr(Product, attr_name)
@@ -39,6 +55,10 @@ async def update_product(db: AsyncSession, product_id: int, product_data: Produc
     for field, value in product_data.model_dump().items(): setattr(db_product, field, value)
 
     db.add(db_product)
+    await db.flush()
+    await refresh_product_listings(db, [db_product.onec_id])
+    await refresh_product_cards(db, [db_product.onec_id])
     await db.commit()
+    catalog.bump()
     await db.refresh(db_product)
     return db_product
@@ -0,0 +1,53 @@
+"""
+Telegram product cards rendered once per content change. normalize_html_for_telegram is a full BeautifulSoup parse,
+so instead of running it on every Product.__str__ the sync (and the admin product/feature writes) store the result in
+Product.tg_card / tg_card_text together with tg_card_hash, a digest of the raw card HTML it was rendered from.
+"""
+import asyncio
+import hashlib
+
+from typing import Any, Iterable
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Product
+from .loading import PRODUCT_CARD
+
+CARD_UPDATE_BATCH_SIZE = 500
+
+def card_hash(source: str) -> str: return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+def render_card(source: str) -> tuple[str, str]:
+    """Sanitized Telegram HTML and its plain-text fallback for a Product.card_source()."""
+    from src.helpers import normalize_html_for_telegram, telegram_html_to_text
+    tg_card = normalize_html_for_telegram(source)
+    return tg_card, telegram_html_to_text(tg_card)
+
+def _render_rows(pending: dict[int, tuple[str, str]]) -> list[dict[str, Any]]:
+    rows = []
+    for product_id, (source, digest) in pending.items():
+        tg_card, tg_card_text = render_card(source)
+        rows.append({"b_id": product_id, "tg_card": tg_card, "tg_card_text": tg_card_text, "tg_card_hash": digest})
+
+    return rows
+
+async def refresh_product_cards(db: AsyncSession, product_onec_ids: Iterable[str] | None = None) -> int:
+    """
+    Re-renders the cards whose source no longer matches tg_card_hash, for all products or only the given ones.
+    Rendering runs in a worker thread to keep BeautifulSoup off the event loop. Does not commit. Returns the number of cards written.
+    """
+    stmt = select(Product).options(*PRODUCT_CARD).where(Product.is_active)
+    if product_onec_ids is not None: stmt = stmt.where(Product.onec_id.in_(list(product_onec_ids)))
+    pending: dict[int, tuple[str, str]] = {}
+    for product in (await db.execute(stmt)).scalars().all():
+        source = product.card_source()
+        digest = card_hash(source)
+        if product.tg_card_hash != digest: pending[product.id] = (source, digest)
+
+    if not pending: return 0
+    rows = await asyncio.to_thread(_render_rows, pending)
+    table = Product.__table__
+    stmt = update(table).where(table.c.id == bindparam("b_id")).values(tg_card=bindparam("tg_card"), tg_card_text=bindparam("tg_card_text"), tg_card_hash=bindparam("tg_card_hash"))
+    for i in range(0, len(rows), CARD_UPDATE_BATCH_SIZE): await db.execute(stmt, rows[i: i + CARD_UPDATE_BATCH_SIZE])
+    return len(rows)
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Feature, Product, ProductListing
+
+NULL_PRICE_LAST = Decimal("99999999999")
+NULL_PRICE_LAST_DESC = Decimal(-1)
+
+def _listing_select(product_onec_ids: Iterable[str] | None = None):
+    in_stock = Feature.balance > 0
+    has_stock = func.coalesce(func.bool_or(in_stock), False)
+    min_price = func.min(case((in_stock, Feature.price), else_=None))
+    max_price = func.max(case((in_stock, Feature.price), else_=None))
+    stmt = (
+        select(
+            Product.id,
+            has_stock,
+            case((has_stock, 0), else_=1),
+            min_price,
+            max_price,
+            func.coalesce(min_price, literal(NULL_PRICE_LAST)),
+            func.coalesce(max_price, literal(NULL_PRICE_LAST_DESC)),
+            func.lower(Product.name),
+            func.now(),
+        )
+        .select_from(Product)
+        .join(Feature, Product.features.and_(Feature.is_active), isouter=True)
+        .where(Product.is_active)
+        .group_by(Product.id)
+    )
+    if product_onec_ids is not None: stmt = stmt.where(Product.onec_id.in_(list(product_onec_ids)))
+    return stmt
+
+async def refresh_product_listings(db: AsyncSession, product_onec_ids: Iterable[str] | None = None) -> int:
+    """
+    Recomputes ProductListing rows from features in one INSERT ... SELECT, for all products or only the given ones.
+    Rows whose values did not change are left untouched, rows of inactive products are deleted, so listings hold only
+    the sellable catalog. Does not commit. Returns the number of rows written or deleted.
+    """
+    columns = ["product_id", "has_stock", "stock_rank", "min_stock_price", "max_stock_price", "sort_price_asc", "sort_price_desc", "lower_name", "refreshed_at"]
+    stmt = insert(ProductListing).from_select(columns, _listing_select(product_onec_ids))
+    changed = [c for c in columns if c not in ("product_id", "refreshed_at")]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id"],
+        set_={c: stmt.excluded[c] for c in (*changed, "refreshed_at")},
+        where=tuple_(*[ProductListing.__table__.c[c] for c in changed]).is_distinct_from(tuple_(*[stmt.excluded[c] for c in changed])),
+    )
+    result = await db.execute(stmt)
+    inactive = select(Product.id).where(~Product.is_active)
+    if product_onec_ids is not None: inactive = inactive.where(Product.onec_id.in_(list(product_onec_ids)))
+    removed = await db.execute(delete(ProductListing).where(ProductListing.product_id.in_(inactive)))
+    return (result.rowcount or 0) + (removed.rowcount or 0)
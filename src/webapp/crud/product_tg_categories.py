@@ -1,12 +1,13 @@
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.webapp import catalog
+from src.webapp.crud.loading import PRODUCT_TG_CATEGORIES
 from src.webapp.models.product import Product
 from src.webapp.models.tg_category import TgCategory
 
 async def add_tg_category_to_product(db: AsyncSession, *, product_onec_id: str, tg_category_id: int,) -> Product:
-    product = (await db.execute(select(Product).options(selectinload(Product.tg_categories)).where(Product.onec_id == product_onec_id))).scalars().first()
+    product = (await db.execute(select(Product).options(*PRODUCT_TG_CATEGORIES).where(Product.onec_id == product_onec_id))).scalars().first()
     if not product: raise ValueError("Product not found")
 
     category = (await db.execute(select(TgCategory).where(TgCategory.id == tg_category_id))).scalars().first()
@@ -15,11 +16,12 @@ async def add_tg_category_to_product(db: AsyncSession, *, product_onec_id: str,
     if category not in product.tg_categories: product.tg_categories.append(category)
 
     await db.commit()
+    catalog.bump()
     await db.refresh(product)
     return product
 
 async def remove_tg_category_from_product(db: AsyncSession, *, product_onec_id: str, tg_category_id: int,) -> Product:
-    product = (await db.execute(select(Product).options(selectinload(Product.tg_categories)).where(Product.onec_id == product_onec_id))).scalars().first()
+    product = (await db.execute(select(Product).options(*PRODUCT_TG_CATEGORIES).where(Product.onec_id == product_onec_id))).scalars().first()
     if not product: raise ValueError("Product not found")
 
     category = (await db.execute(select(TgCategory).where(TgCategory.id == tg_category_id))).scalars().first()
@@ -27,5 +29,6 @@ async def remove_tg_category_from_product(db: AsyncSession, *, product_onec_id:
     elif category in product.tg_categories: product.tg_categories.remove(category)
 
     await db.commit()
+    catalog.bump()
     await db.refresh(product)
     return product
\ No newline at end of file
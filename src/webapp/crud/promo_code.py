@@ -3,17 +3,22 @@ from __future__ import annotations
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.webapp.crud.loading import PROMO_CARTS
 from src.webapp.models.promo_code import PromoCode
 from src.webapp.schemas.promo_code import PromoCodeCreate, PromoCodeUpdate
 
-async def get_promo_by_id(db: AsyncSession, promo_id: int) -> PromoCode | None:
-    res = await db.execute(select(PromoCode).where(PromoCode.id == promo_id))
+async def get_promo_by_id(db: AsyncSession, promo_id: int, with_carts: bool = False) -> PromoCode | None:
+    stmt = select(PromoCode).where(PromoCode.id == promo_id)
+    if with_carts: stmt = stmt.options(*PROMO_CARTS)
+    res = await db.execute(stmt)
     return res.scalar_one_or_none()
 
-async def get_promo_by_code(db: AsyncSession, code: str) -> PromoCode | None:
+async def get_promo_by_code(db: AsyncSession, code: str, with_carts: bool = False) -> PromoCode | None:
     code = (code or "").strip()
     if not code: return None
-    res = await db.execute(select(PromoCode).where(PromoCode.code == code))
+    stmt = select(PromoCode).where(PromoCode.code == code)
+    if with_carts: stmt = stmt.options(*PROMO_CARTS)
+    res = await db.execute(stmt)
     return res.scalar_one_or_none()
 
 async def list_promos(db: AsyncSession):
@@ -1,11 +1,21 @@
+import base64
+import json
+import re
+
+from decimal import Decimal
 from typing import Literal, Any
-from sqlalchemy import func, case, select, bindparam, cast, String, or_
+from sqlalchemy import func, select, bindparam, cast, String, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
 
+from config import SEARCH_BACKEND, SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL
 from src.helpers import normalize, normalize_user_value
-from src.webapp.models import Product, User, Cart
+from src.webapp import catalog
+from src.webapp.cache import LRUCache
+from src.webapp.crud.loading import CART_SUMMARY, PRODUCT_CARD
+from src.webapp.crud.product_listing import NULL_PRICE_LAST, NULL_PRICE_LAST_DESC
+from src.webapp.models import Product, ProductListing, User, Cart
 from src.webapp.models.product_tg_categories import product_tg_categories
+from src.webapp.search_index import SortKey, search_index, tokenize, product_result
 
 def _parse_int_csv(value: str | None) -> list[int]:
     if not value: return []
@@ -24,104 +34,159 @@ def _parse_int_csv(value: str | None) -> list[int]:
 
     return res
 
-async def _allowed_product_onec_ids_by_tg_categories(db: AsyncSession, tg_category_ids: list[int], mode: Literal["any", "all"] = "any") -> set[str] | None:
-    if not tg_category_ids: return None
-    if mode == "all": stmt = (select(product_tg_categories.c.product_onec_id).where(product_tg_categories.c.tg_category_id.in_(tg_category_ids)).group_by(product_tg_categories.c.product_onec_id).having(func.count(func.distinct(product_tg_categories.c.tg_category_id)) == len(tg_category_ids)))
-    else: stmt = (select(product_tg_categories.c.product_onec_id).where(product_tg_categories.c.tg_category_id.in_(tg_category_ids)).distinct())
-    rows = (await db.execute(stmt)).scalars().all()
-    return set(rows)
-
-async def search_products(db: AsyncSession, q: str | None, page: int, limit: int, tg_category_ids: str | None = None, tg_category_mode: Literal["any", "all"] = "any", sort_by: Literal["name", "price"] = "name", sort_dir: Literal["asc", "desc"] = "asc"):
-    offset = page * limit
-    filtered = []
-    batch_size = 60
-    skip = 0
+def _encode_cursor(sort_by: str, sort_dir: str, key: SortKey) -> str:
+    raw = json.dumps([sort_by, sort_dir, *key], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode_cursor(cursor: str, sort_by: str, sort_dir: str) -> SortKey:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, cursor_sort_dir, stock_rank, price, lower_name, product_id = json.loads(raw)
+    except Exception as exc: raise ValueError("Invalid cursor") from exc
+    if (cursor_sort_by, cursor_sort_dir) != (sort_by, sort_dir): raise ValueError("Cursor was issued for another sort order")
+    return int(stock_rank), float(price) if price is not None else None, str(lower_name), int(product_id)
+
+def _keyset_after(columns: list[tuple[Any, bool]], values: list[Any]):
+    """(c1, c2, ...) > (v1, v2, ...) with a per-column direction, which a plain row comparison can not express."""
+    clauses = []
+    for i, (col, desc) in enumerate(columns):
+        prefix = [c == v for (c, _), v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*prefix, col < values[i] if desc else col > values[i]))
+
+    return or_(*clauses)
+
+def _tg_categories_filter(tg_category_ids: list[int], mode: Literal["any", "all"] = "any"):
+    ptc = product_tg_categories.c
+    stmt = select(ptc.product_onec_id).where(ptc.tg_category_id.in_(tg_category_ids))
+    if mode == "all": stmt = stmt.group_by(ptc.product_onec_id).having(func.count(func.distinct(ptc.tg_category_id)) == len(tg_category_ids))
+    return Product.onec_id.in_(stmt)
+
+# Keys carry catalog.version(), which follows bumps from the 1C worker and the admin bot too; the TTL is only a backstop
+total_cache = LRUCache(SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+result_cache = LRUCache(SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+catalog.on_change(total_cache.clear)
+catalog.on_change(result_cache.clear)
+
+async def _cached_total(db: AsyncSession, signature: tuple, stmt) -> int:
+    """Count of `stmt` per filter signature and catalog version, so keyset pages of a new version never reuse an old total."""
+    signature = (catalog.version(), *signature)
+    total = total_cache.get(signature)
+    if total is None:
+        total = int(await db.scalar(select(func.count()).select_from(stmt.with_only_columns(Product.id).order_by(None).subquery())) or 0)
+        total_cache.set(signature, total)
+
+    return total
+
+async def _search_products_sql(db: AsyncSession, norm_q: str | None, cat_ids: list[int], tg_category_mode: Literal["any", "all"], sort_by: Literal["name", "price"], sort_dir: Literal["asc", "desc"], offset: int, limit: int, after: SortKey | None = None) -> tuple[list[dict[str, Any]], int, SortKey | None]:
+    listing = ProductListing.__table__.c
+    price_desc = (sort_by, sort_dir) == ("price", "desc")
+    price = listing.max_stock_price if price_desc else listing.min_stock_price
+    sort_price = listing.sort_price_desc if price_desc else listing.sort_price_asc
+    stock_rank = listing.stock_rank
+    lower_name = listing.lower_name
+    if sort_by == "price": columns = [(stock_rank, False), (sort_price, price_desc), (lower_name, False), (listing.product_id, False)]
+    else: columns = [(stock_rank, False), (lower_name, sort_dir == "desc"), (sort_price, False), (listing.product_id, False)]
+
+    tokens = tokenize(norm_q or "")
+    stmt = select(Product, stock_rank.label("stock_rank"), price.label("price"), lower_name.label("lower_name")).join(ProductListing, ProductListing.product_id == Product.id).where(Product.is_active).options(*PRODUCT_CARD)
+    for token in tokens: stmt = stmt.where(Product.search_name.contains(token, autoescape=True))
+    if cat_ids: stmt = stmt.where(_tg_categories_filter(cat_ids, tg_category_mode))
+    total = await _cached_total(db, (tuple(sorted(set(tokens))), tuple(sorted(cat_ids)), tg_category_mode if cat_ids else None), stmt)
+
+    page_stmt = stmt.order_by(*[col.desc() if desc else col.asc() for col, desc in columns])
+    if after is not None:
+        after_stock_rank, after_price, after_name, after_id = after
+        after_price = Decimal(str(after_price)) if after_price is not None else (NULL_PRICE_LAST_DESC if price_desc else NULL_PRICE_LAST)
+        values = [after_stock_rank, after_price, after_name, after_id] if sort_by == "price" else [after_stock_rank, after_name, after_price, after_id]
+        page_stmt = page_stmt.where(_keyset_after(columns, values))
+
+    else: page_stmt = page_stmt.offset(offset)
+    rows = (await db.execute(page_stmt.limit(limit + 1))).all()
+    next_key = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_key = (int(last.stock_rank), float(last.price) if last.price is not None else None, last.lower_name, last.Product.id)
+
+    return [product_result(row.Product) for row in rows], total, next_key
+
+async def search_products(db: AsyncSession, q: str | None, page: int, limit: int, tg_category_ids: str | None = None, tg_category_mode: Literal["any", "all"] = "any", sort_by: Literal["name", "price"] = "name", sort_dir: Literal["asc", "desc"] = "asc", backend: Literal["index", "sql"] | None = None, cursor: str | None = None, fuzzy: bool = False):
+    """
+    Offset pagination via `page`, or keyset pagination via `cursor` (the `next_cursor` of the previous page).
+    `fuzzy` tolerates typos and ranks by match quality; it is always served by the in-memory index and pages by `page` only.
+    Raises ValueError for a malformed cursor.
+    """
+    norm_q = await normalize(q) if q else None
+    cat_ids = _parse_int_csv(tg_category_ids)
+    if fuzzy and cursor: raise ValueError("Fuzzy search is paginated by page, not by cursor")
+    after = _decode_cursor(cursor, sort_by, sort_dir) if cursor else None
+    backend = backend or SEARCH_BACKEND
+    cache_key = (catalog.version(), backend, " ".join(tokenize(norm_q or "")), tuple(sorted(cat_ids)), tg_category_mode if cat_ids else None, sort_by, sort_dir, after if after else page, limit, fuzzy)
+    cached = result_cache.get(cache_key)
+    if cached is not None: return cached
+
+    next_key = did_you_mean = None
+    if fuzzy:
+        await search_index.ensure(db)
+        results, total, did_you_mean = search_index.fuzzy_search(norm_q, cat_ids, tg_category_mode, sort_by, sort_dir, offset=page * limit, limit=limit)
+
+    elif backend == "sql": results, total, next_key = await _search_products_sql(db, norm_q, cat_ids, tg_category_mode, sort_by, sort_dir, offset=page * limit, limit=limit, after=after)
+    else:
+        await search_index.ensure(db)
+        results, total, next_key = search_index.search(norm_q, cat_ids, tg_category_mode, sort_by, sort_dir, offset=page * limit, limit=limit, after=after)
+
+    if not fuzzy and not total and norm_q:
+        await search_index.ensure(db)
+        did_you_mean = search_index.did_you_mean(norm_q)
+
+    response = {"results": results, "total": total, "next_cursor": _encode_cursor(sort_by, sort_dir, next_key) if next_key else None, "did_you_mean": did_you_mean}
+    result_cache.set(cache_key, response)
+    return response
+
+async def suggest_products(db: AsyncSession, prefix: str | None, limit: int = 10) -> list[dict[str, Any]]:
+    prefix = " ".join((prefix or "").lower().split())
+    if not prefix: return []
+    cache_key = (catalog.version(), "suggest", prefix, limit)
+    cached = result_cache.get(cache_key)
+    if cached is not None: return cached
+
+    await search_index.ensure(db)
+    results = search_index.suggest([prefix, await normalize(prefix)], limit=limit)
+    result_cache.set(cache_key, results)
+    return results
+
+async def search_facets(db: AsyncSession, q: str | None, tg_category_ids: str | None = None, tg_category_mode: Literal["any", "all"] = "any", fuzzy: bool = False) -> dict[str, Any]:
     norm_q = await normalize(q) if q else None
     cat_ids = _parse_int_csv(tg_category_ids)
-    allowed_onec_ids = await _allowed_product_onec_ids_by_tg_categories(db, tg_category_ids=cat_ids, mode=tg_category_mode)
-    Feature = Product.features.property.mapper.class_
-    stats_sq = select(Product.id.label("pid"), func.max(case((Feature.balance > 0, 1), else_=0)).label("has_stock"), func.min(case((Feature.balance > 0, Feature.price), else_=None)).label("min_stock_price"), func.max(case((Feature.balance > 0, Feature.price), else_=None)).label("max_stock_price")).select_from(Product).join(Feature, Product.features, isouter=True).group_by(Product.id).subquery()
-    stock_rank = case((stats_sq.c.has_stock == 1, 0), else_=1)
-
-    def ordered_stmt():
-        stmt = select(Product).join(stats_sq, stats_sq.c.pid == Product.id).options(selectinload(Product.features))
-        if allowed_onec_ids is not None: stmt = stmt.where(Product.onec_id.in_(allowed_onec_ids))
-        if sort_by == "price":
-            if sort_dir == "asc": stmt = stmt.order_by(stock_rank, stats_sq.c.min_stock_price.nulls_last(), func.lower(Product.name).asc())
-            else: stmt = stmt.order_by(stock_rank, stats_sq.c.max_stock_price.desc().nulls_last(), func.lower(Product.name).asc())
+    cache_key = (catalog.version(), "facets", " ".join(tokenize(norm_q or "")), tuple(sorted(cat_ids)) if tg_category_mode == "all" else (), tg_category_mode, fuzzy)
+    cached = result_cache.get(cache_key)
+    if cached is not None: return cached
 
-        else:
-            if sort_dir == "asc": stmt = stmt.order_by(stock_rank, func.lower(Product.name).asc(), stats_sq.c.min_stock_price.nulls_last())
-            else: stmt = stmt.order_by(stock_rank, func.lower(Product.name).desc(), stats_sq.c.min_stock_price.nulls_last())
-
-        return stmt
-
-    while True:
-        stmt = ordered_stmt().offset(skip).limit(batch_size)
-        result = await db.execute(stmt)
-        batch = result.scalars().all()
-        if not batch: break
-        for product in batch:
-            if norm_q and norm_q not in await normalize(product.name): continue
-            all_features = list(product.features or [])
-            in_stock_features = [f for f in all_features if (getattr(f, "balance", 0) or 0) > 0]
-            prices = [float(f.price) for f in in_stock_features if f.price is not None]
-            min_price = min(prices) if prices else 0.0
-            max_price = max(prices) if prices else 0.0
-
-            filtered.append(
-                {
-                    "name": product.name,
-                    "onec_id": product.onec_id,
-                    "url": f"/product/{product.onec_id}",
-                    "image": "/static/images/product.png",
-                    "min_price": min_price,
-                    "max_price": max_price,
-                    "features": [
-                        {
-                            "id": f.onec_id,
-                            "name": f.name,
-                            "price": float(f.price) if f.price is not None else None,
-                            "balance": getattr(f, "balance", 0) or 0,
-                        }
-                        for f in all_features
-                    ],
-                }
-            )
-
-        skip += batch_size
-
-    page_results = filtered[offset: offset + limit]
-    if q or cat_ids: total = len(filtered)
-    else: total = await db.scalar(select(func.count()).select_from(Product))
-
-    for item in page_results:
-        item.pop("min_price", None)
-        item.pop("max_price", None)
-
-    return {"results": page_results, "total": total}
+    await search_index.ensure(db)
+    response = search_index.facets(norm_q, cat_ids, tg_category_mode, fuzzy=fuzzy)
+    result_cache.set(cache_key, response)
+    return response
+
+def _digits(value: Any) -> str: return re.sub(r"\D", "", str(value))
 
 async def search_users(db: AsyncSession, by: str, value: Any, page: int | None = None, limit: int | None = None) -> tuple[list[User], int]:
-    stmt = select(User)
+    """
+    Substring lookup for the admin bot. tg_id, phones and full name are matched against the generated
+    tg_id_text / *_phone_digits / search_full_name columns, which carry trigram indexes.
+    The total comes from a window count on the same query.
+    """
+    total_col = func.count().over().label("total")
+    stmt = select(User, total_col)
     if by is not None:
         norm_value = normalize_user_value(by, value) if by != "full_name" else str(value)
         if norm_value is None or str(norm_value).strip() == "": return [], 0
-        if by == "tg_id":
-            col = getattr(User, "tg_id", None)
-            if col is None: return [], 0
-            v = str(norm_value).replace(" ", "")
-            stmt = stmt.where(cast(col, String).ilike(bindparam("v", f"%{v}%", type_=String())))
-
-        elif by == "full_name": stmt = stmt.where(User.full_name.ilike(bindparam("v", f"%{norm_value}%", type_=String())))
+        # Without a digit LIKE '%%' would match every user
+        if by in ("tg_id", "phone") and not _digits(norm_value): return [], 0
+        if by == "tg_id": stmt = stmt.where(User.tg_id_text.like(f"%{_digits(norm_value)}%"))
+        elif by == "full_name": stmt = stmt.where(User.search_full_name.ilike(bindparam("v", f"%{str(norm_value).strip()}%", type_=String())))
         elif by == "phone":
-            phone_col = getattr(User, "phone", None)
-            tg_phone_col = getattr(User, "tg_phone", None)
-            if phone_col is None and tg_phone_col is None: return [], 0
-            v = str(norm_value).replace(" ", "")
-            conds = []
-            if phone_col is not None: conds.append(func.replace(cast(phone_col, String), " ", "").ilike(bindparam("v", f"%{v}%", type_=String())))
-            if tg_phone_col is not None: conds.append(func.replace(cast(tg_phone_col, String), " ", "").ilike(bindparam("v", f"%{v}%", type_=String())))
-            stmt = stmt.where(or_(*conds))
+            v = _digits(norm_value)
+            stmt = stmt.where(or_(User.phone_digits.like(f"%{v}%"), User.tg_phone_digits.like(f"%{v}%")))
 
         else:
             col = getattr(User, by, None)
@@ -130,18 +195,20 @@ async def search_users(db: AsyncSession, by: str, value: Any, page: int | None =
             col_nospace = func.replace(cast(col, String), " ", "")
             stmt = stmt.where(col_nospace.ilike(bindparam("v", f"%{v}%", type_=String())))
 
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total = await db.scalar(count_stmt)
-
     stmt = stmt.order_by(User.tg_id.desc())
     if limit is not None: stmt = stmt.limit(limit)
     if page is not None and limit is not None: stmt = stmt.offset(page * limit)
 
-    rows = (await db.execute(stmt)).scalars().all()
-    return rows, int(total or 0)
+    rows = (await db.execute(stmt)).all()
+    if rows: return [row[0] for row in rows], int(rows[0].total)
+    if not page: return [], 0
+
+    # Past the last page the window has no rows to count on; fall back to a plain count
+    count_stmt = select(func.count()).select_from(stmt.with_only_columns(User.tg_id).limit(None).offset(None).order_by(None).subquery())
+    return [], int(await db.scalar(count_stmt) or 0)
 
 async def search_carts(db: AsyncSession, value: Any, page: int | None = None, limit: int | None = None) -> tuple[list[Cart], int]:
-    stmt = (select(Cart).where(or_(Cart.name.is_(None), ~Cart.name.ilike(f"%ачальная%"))).options(selectinload(Cart.items), joinedload(Cart.promo), selectinload(Cart.user)))
+    stmt = (select(Cart).where(or_(Cart.name.is_(None), ~Cart.name.ilike(f"%ачальная%"))).options(*CART_SUMMARY))
     v = str(value).replace(" ", "").strip()
     if not v: return [], 0
     col = getattr(Cart, "id", None)
@@ -1,6 +1,8 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.webapp import catalog
+from src.webapp.crud.loading import TG_CATEGORY_PRODUCTS
 from src.webapp.models.tg_category import TgCategory
 from src.webapp.schemas.tg_category import TgCategoryCreate, TgCategoryUpdate
 
@@ -8,6 +10,7 @@ async def create_tg_category(db: AsyncSession, data: TgCategoryCreate) -> TgCate
     obj = TgCategory(name=data.name.strip(), description=data.description)
     db.add(obj)
     await db.commit()
+    catalog.bump()
     await db.refresh(obj)
     return obj
 
@@ -15,22 +18,28 @@ async def list_tg_categories(db: AsyncSession) -> list[TgCategory]:
     res = await db.execute(select(TgCategory).order_by(TgCategory.name.asc()))
     return list(res.scalars().all())
 
-async def get_tg_category_by_id(db: AsyncSession, category_id: int) -> TgCategory | None:
-    res = await db.execute(select(TgCategory).where(TgCategory.id == category_id))
+async def get_tg_category_by_id(db: AsyncSession, category_id: int, with_products: bool = False) -> TgCategory | None:
+    stmt = select(TgCategory).where(TgCategory.id == category_id)
+    if with_products: stmt = stmt.options(*TG_CATEGORY_PRODUCTS)
+    res = await db.execute(stmt)
     return res.scalars().first()
 
-async def get_tg_category_by_name(db: AsyncSession, name: str) -> TgCategory | None:
+async def get_tg_category_by_name(db: AsyncSession, name: str, with_products: bool = False) -> TgCategory | None:
     name = name.strip()
-    res = await db.execute(select(TgCategory).where(TgCategory.name == name))
+    stmt = select(TgCategory).where(TgCategory.name == name)
+    if with_products: stmt = stmt.options(*TG_CATEGORY_PRODUCTS)
+    res = await db.execute(stmt)
     return res.scalars().first()
 
 async def update_tg_category(db: AsyncSession, obj: TgCategory, data: TgCategoryUpdate) -> TgCategory:
     if data.name is not None: obj.name = data.name.strip()
     if data.description is not None: obj.description = data.description
     await db.commit()
+    catalog.bump()
     await db.refresh(obj)
     return obj
 
 async def delete_tg_category(db: AsyncSession, obj: TgCategory) -> None:
     await db.delete(obj)
-    await db.commit()
\ No newline at end of file
+    await db.commit()
+    catalog.bump()
\ No newline at end of file
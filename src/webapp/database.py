@@ -33,7 +33,10 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 class BaseModelMixin:
-    def to_dict(self) -> dict[str, object]: return {c.key: getattr(self, c.key) for c in inspect(self).mapper.column_attrs}
+    def to_dict(self) -> dict[str, object]:
+        state = inspect(self)
+        # Skips columns that were not loaded (deferred ones such as Product.tg_card) instead of triggering a load
+        return {c.key: getattr(self, c.key) for c in state.mapper.column_attrs if c.key not in state.unloaded}
     def to_json(self) -> str: return json.dumps(self.to_dict(), default=str)
 
 class Base(DeclarativeBase, BaseModelMixin): pass
@@ -41,6 +44,7 @@ class Base(DeclarativeBase, BaseModelMixin): pass
 async def init_db(recreate: bool):
     logger = getLogger(__name__)
     async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         if recreate:
             logger.warning("Recreating entire database schema...")
             await conn.run_sync(Base.metadata.drop_all)
@@ -78,21 +82,22 @@ async def clear_tables(logger: Logger) -> None:
         logger.error(f"Failed to clear tables: {e}")
         raise
 
-async def get_db_items(logger: Logger) -> None:
+async def get_db_items(logger: Logger, only: list[str] | None = None) -> None:
+    """Logs every row of every table (or of `only`) at debug level. A debugging aid: its cost grows with the whole DB."""
     async with engine.connect() as conn:
         result = await conn.execute(text("""SELECT tablename FROM pg_tables WHERE schemaname = 'public' ORDER BY tablename; """))
-        tables = [row[0] for row in result.fetchall()]
+        tables = [row[0] for row in result.fetchall() if only is None or row[0] in only]
         if not tables: return logger.warning("No tables found in database")
         for table in tables:
             logger.debug(f"📋 Table: {table}")
             try:
-                res = await conn.execute(text(f'SELECT * FROM "{table}";'))
-                rows = res.fetchall()                  
-                if not rows:
-                    logger.debug("  (empty)")
-                    continue
+                res = await conn.stream(text(f'SELECT * FROM "{table}";'))
                 colnames = res.keys()
                 logger.debug("  Columns: " + ", ".join(colnames))
-                for row in rows: logger.debug("  " + str(dict(zip(colnames, row))))
+                empty = True
+                async for row in res:
+                    empty = False
+                    logger.debug("  " + str(dict(zip(colnames, row))))
+                if empty: logger.debug("  (empty)")
             except Exception as e: logger.error(f"  Failed to fetch {table}: {e}")
         return None
@@ -0,0 +1,53 @@
+import hashlib
+
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+
+from config import CATALOG_CACHE_CONTROL
+from src.webapp import catalog
+
+
+def catalog_etag(request: Request) -> str:
+    """Weak ETag for a catalog read: the catalog version plus a digest of the path and (order-insensitive) query."""
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(f"{request.url.path}?{query}".encode("utf-8"), digest_size=8).hexdigest()
+    return f'W/"{catalog.version()}-{digest}"'
+
+def _opaque(tag: str) -> str: return tag.strip().removeprefix("W/")
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match wins over If-Modified-Since, as in RFC 9110."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None: return if_none_match.strip() == "*" or _opaque(etag) in {_opaque(t) for t in if_none_match.split(",")}
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if not if_modified_since: return False
+    try: since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError): return False
+    return since.tzinfo is not None and catalog.changed_at().replace(microsecond=0) <= since
+
+async def catalog_response(request: Request, build: Callable[[], Awaitable[Any]]) -> Response:
+    """
+    Serves a catalog read with ETag / Last-Modified / Cache-Control, answering 304 without calling `build`
+    when the client already holds the current version. The tag is taken before building, so a sync that lands
+    mid-request can only make the tag older than the body, never newer.
+    """
+    etag = catalog_etag(request)
+    headers = {"ETag": etag, "Last-Modified": format_datetime(catalog.changed_at(), usegmt=True), "Cache-Control": CATALOG_CACHE_CONTROL}
+    if is_not_modified(request, etag): return Response(status_code=304, headers=headers)
+    return JSONResponse(jsonable_encoder(await build()), headers=headers)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-addressed files (src/webapp/images.py): a name never changes meaning, so clients may keep it for a year."""
+    CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        if response.status_code in (200, 304): response.headers["Cache-Control"] = self.CACHE_CONTROL
+        return response
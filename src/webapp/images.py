@@ -0,0 +1,193 @@
+"""
+Resized, content-addressed copies of the product and feature photos in IMAGES_DIR.
+
+Every source photo gets one WebP per VARIANTS entry named <onec_id>.<variant>.<hash>.webp, the hash covering the source
+bytes and the variant settings, so a name never changes meaning and /img serves it as immutable.
+manifest.json in IMAGE_VARIANTS_DIR maps onec_id -> variant -> file name for the URLs the API returns.
+
+    python -m src.webapp.images            # backfill: render whatever is missing, prune what is no longer referenced
+    python -m src.webapp.images --force    # re-render everything
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from config import IMAGES_DIR, IMAGE_URL_PREFIX, IMAGE_VARIANTS_DIR
+
+
+@dataclass(frozen=True, slots=True)
+class Variant:
+    name: str
+    max_side: int
+    quality: int
+
+
+VARIANTS = (
+    Variant("thumb", 160, 70),    # cart rows, search suggestions
+    Variant("card", 480, 78),     # catalog grid
+    Variant("full", 1200, 82),    # product page
+)
+PLACEHOLDER_ID = "product"        # static/images/product.png
+PLACEHOLDER_URL = "/static/images/product.png"
+MANIFEST_RELOAD_INTERVAL = 5.0
+
+
+def _render(source: bytes, variant: Variant) -> bytes:
+    with Image.open(io.BytesIO(source)) as original:
+        image = ImageOps.exif_transpose(original)
+        # thumbnail() keeps the aspect ratio and never upscales
+        image.thumbnail((variant.max_side, variant.max_side), Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "RGBA"): image = image.convert("RGBA" if image.mode in ("LA", "PA") or "transparency" in image.info else "RGB")
+        out = io.BytesIO()
+        image.save(out, "WEBP", quality=variant.quality, method=6)
+        return out.getvalue()
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def variant_names(onec_id: str, source: bytes) -> dict[str, str]:
+    digest = hashlib.blake2b(source, digest_size=16)
+    names = {}
+    for variant in VARIANTS:
+        h = digest.copy()
+        h.update(f"{variant.max_side}:{variant.quality}:webp".encode())
+        names[variant.name] = f"{onec_id}.{variant.name}.{h.hexdigest()[:16]}.webp"
+
+    return names
+
+def render_variants(onec_id: str, source: bytes, force: bool = False) -> dict[str, str]:
+    """Writes the missing variants of one source photo and returns variant -> file name. CPU bound: run it in a thread."""
+    names = variant_names(onec_id, source)
+    for variant in VARIANTS:
+        path = IMAGE_VARIANTS_DIR / names[variant.name]
+        if force or not path.exists(): _write_atomic(path, _render(source, variant))
+
+    return names
+
+
+class ImageManifest:
+    """
+    onec_id -> variant -> file name, persisted as JSON next to the variants. The admin bot writes it and the webapp reads it,
+    possibly from another process, so reads pick up a changed file at most MANIFEST_RELOAD_INTERVAL seconds late.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: dict[str, dict[str, str]] = {}
+        self._mtime: int | None = None
+        self._checked_at = 0.0
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    def _reload(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < MANIFEST_RELOAD_INTERVAL: return
+        self._checked_at = now
+        try: mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError: mtime = None
+        if mtime == self._mtime: return
+
+        try: entries = json.loads(self.path.read_text(encoding="utf-8")) if mtime is not None else {}
+        except (OSError, ValueError) as e: return self.log.warning(f"Image manifest {self.path} unreadable, keeping the previous one: {e}")
+        self._entries, self._mtime = entries, mtime
+
+    def _save(self) -> None:
+        _write_atomic(self.path, json.dumps(self._entries, ensure_ascii=False, sort_keys=True, indent=1).encode("utf-8"))
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def get(self, onec_id: str) -> dict[str, str] | None:
+        self._reload()
+        return self._entries.get(onec_id)
+
+    def entries(self) -> dict[str, dict[str, str]]:
+        self._reload(force=True)
+        return dict(self._entries)
+
+    def replace(self, entries: dict[str, dict[str, str]]) -> None:
+        self._entries = dict(entries)
+        self._save()
+
+    def set(self, onec_id: str, names: dict[str, str]) -> dict[str, str] | None:
+        """Stores the names for onec_id and returns the ones they replace."""
+        self._reload(force=True)
+        previous = self._entries.get(onec_id)
+        self._entries[onec_id] = names
+        self._save()
+        return previous
+
+    def pop(self, onec_id: str) -> dict[str, str] | None:
+        self._reload(force=True)
+        previous = self._entries.pop(onec_id, None)
+        if previous is not None: self._save()
+        return previous
+
+
+image_manifest = ImageManifest(IMAGE_VARIANTS_DIR / "manifest.json")
+log = logging.getLogger("images")
+
+
+def image_urls(onec_id: str, fallback: bool = True) -> dict[str, str]:
+    """variant -> URL for onec_id, the placeholder's variants when it has no photo (with `fallback`), or {}."""
+    names = image_manifest.get(onec_id) or (image_manifest.get(PLACEHOLDER_ID) if fallback else None) or {}
+    return {variant: f"{IMAGE_URL_PREFIX}/{name}" for variant, name in names.items()}
+
+def _unlink_stale(previous: dict[str, str] | None, current: dict[str, str] | None = None) -> None:
+    keep = set((current or {}).values())
+    for name in set((previous or {}).values()) - keep: (IMAGE_VARIANTS_DIR / name).unlink(missing_ok=True)
+
+async def save_variants(onec_id: str, source: bytes) -> dict[str, str] | None:
+    """Renders the variants of a freshly uploaded photo and swaps them into the manifest; None if the bytes are not an image."""
+    try: names = await asyncio.to_thread(render_variants, onec_id, source)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        log.warning(f"Could not render image variants for {onec_id}: {e}")
+        return None
+
+    _unlink_stale(image_manifest.set(onec_id, names), names)
+    return names
+
+def delete_variants(onec_id: str) -> None: _unlink_stale(image_manifest.pop(onec_id))
+
+
+def backfill(force: bool = False) -> dict[str, int]:
+    """Renders variants for every photo in IMAGES_DIR, then drops manifest entries and files nothing refers to anymore."""
+    counts = {"photos": 0, "rendered": 0, "failed": 0, "pruned": 0}
+    entries: dict[str, dict[str, str]] = {}
+    for path in sorted(IMAGES_DIR.glob("*.png")):
+        counts["photos"] += 1
+        onec_id = path.stem
+        try:
+            source = path.read_bytes()
+            missing = force or any(not (IMAGE_VARIANTS_DIR / name).exists() for name in variant_names(onec_id, source).values())
+            entries[onec_id] = render_variants(onec_id, source, force)
+            counts["rendered"] += missing
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            counts["failed"] += 1
+            log.warning(f"Could not render image variants for {path.name}: {e}")
+
+    image_manifest.replace(entries)
+    referenced = {name for names in entries.values() for name in names.values()}
+    for path in IMAGE_VARIANTS_DIR.glob("*.webp"):
+        if path.name not in referenced:
+            path.unlink(missing_ok=True)
+            counts["pruned"] += 1
+
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Re-render variants that already exist")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    print(f"{backfill(args.force)} in {time.perf_counter() - started:.1f}s")
@@ -4,11 +4,13 @@ from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from uvicorn import Server, Config
 
-from config import BASE_DIR, templates, API_PREFIX
+from config import BASE_DIR, templates, API_PREFIX, IMAGE_URL_PREFIX, IMAGE_VARIANTS_DIR
+from src.webapp.http_cache import ImmutableStaticFiles
 from src.webapp.routes import *
 
 app = FastAPI(title="ElixirPeptides")
 app.mount("/static", StaticFiles(directory=BASE_DIR / "src" / "webapp" / "static", html=True), name="static")
+app.mount(IMAGE_URL_PREFIX, ImmutableStaticFiles(directory=IMAGE_VARIANTS_DIR), name="img")
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://127.0.0.1:8000", "http://localhost:8000", "https://www.devsivanschostakov.org", "https://www.devsivanschostakov.org"],                        
@@ -29,6 +31,7 @@ app.include_router(favourite_router, prefix=API_PREFIX)
 app.include_router(categories_router, prefix=API_PREFIX)
 app.include_router(promo_codes_router, prefix=API_PREFIX)
 app.include_router(internal_bot_router, prefix=API_PREFIX)
+app.include_router(catalog_router, prefix=API_PREFIX)
 app.include_router(webhooks_router)
 
 @app.get("/", response_class=HTMLResponse)
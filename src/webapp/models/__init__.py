@@ -3,6 +3,7 @@ from pydantic import BaseModel, Field
 from .category import Category
 from .feature import Feature
 from .product import Product
+from .product_listing import ProductListing
 from .unit import Unit
 from .user import User
 from .user_token_usage import UserTokenUsage, BotEnum
@@ -13,7 +14,7 @@ from .tg_category import TgCategory
 from .used_code import UsedCode
 from .promo_code import PromoCode
 
-__all__ = ['Category', 'Product', 'Unit', 'Feature', 'User', 'UserTokenUsage', 'BotEnum', 'PVZRequest', 'CartItem', 'Cart', 'Favourite', 'TgCategory', 'UsedCode']
+__all__ = ['Category', 'Product', 'ProductListing', 'Unit', 'Feature', 'User', 'UserTokenUsage', 'BotEnum', 'PVZRequest', 'CartItem', 'Cart', 'Favourite', 'TgCategory', 'UsedCode']
 
 class PVZRequest(BaseModel):
     latitude: float | None = Field(None, description="Latitude (if geo_id not provided)")
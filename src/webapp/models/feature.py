@@ -1,5 +1,5 @@
 from decimal import Decimal
-from sqlalchemy import ForeignKey, Integer, Numeric, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, Numeric, String, text, true
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.webapp.database import Base
@@ -7,6 +7,7 @@ from src.webapp.database import Base
 
 class Feature(Base):
     __tablename__ = "features"
+    __table_args__ = (Index("ix_features_active_product_onec_id", "product_onec_id", postgresql_where=text("is_active")),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
     onec_id: Mapped[str] = mapped_column(String, index=True, unique=True, nullable=False)
@@ -16,6 +17,8 @@ class Feature(Base):
     file_id: Mapped[str | None] = mapped_column(String, index=True, nullable=True)
     price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False, default=0)
     balance: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Cleared by the 1C sync like Product.is_active; inactive features stay only for the order history
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=true())
 
     product: Mapped["Product"] = relationship("Product", back_populates="features")
-    cart_items: Mapped[list["CartItem"]] = relationship("CartItem", back_populates="feature", foreign_keys="CartItem.feature_onec_id", lazy="selectin", passive_deletes=True)
+    cart_items: Mapped[list["CartItem"]] = relationship("CartItem", back_populates="feature", foreign_keys="CartItem.feature_onec_id", lazy="raise", passive_deletes=True)
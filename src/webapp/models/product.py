@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text, inspect, text, true
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.webapp.database import Base
@@ -9,6 +9,11 @@ from src.webapp.models.product_tg_categories import product_tg_categories
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_search_name_trgm", "search_name", postgresql_using="gin", postgresql_ops={"search_name": "gin_trgm_ops"}),
+        # Every catalog read filters on is_active, so it scans only the sellable products
+        Index("ix_products_active_id", "id", postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
     onec_id: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
@@ -18,20 +23,27 @@ class Product(Base):
     usage: Mapped[str | None] = mapped_column(String, nullable=True)
     expiration: Mapped[str | None] = mapped_column(String, nullable=True)
     category_onec_id: Mapped[str | None] = mapped_column(String, ForeignKey("categories.onec_id", ondelete="SET NULL"), nullable=True, index=True)
+    search_name: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Cleared by the 1C sync once the product leaves the feed (deleted or filtered out in get_products_1c), set again if it returns
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=true())
+    # Rendered by crud.product_card.refresh_product_cards, valid while tg_card_hash matches card_source(); loaded only via PRODUCT_TELEGRAM_CARD
+    tg_card: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_raiseload=True)
+    tg_card_text: Mapped[str | None] = mapped_column(Text, nullable=True, deferred=True, deferred_raiseload=True)
+    tg_card_hash: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
     category: Mapped["Category"] = relationship("Category", back_populates="products")
     features: Mapped[list["Feature"]] = relationship("Feature", back_populates="product", cascade="all, delete-orphan")
-    cart_items: Mapped[list["CartItem"]] = relationship("CartItem", back_populates="product", foreign_keys="CartItem.product_onec_id", lazy="selectin", passive_deletes=True)
+    cart_items: Mapped[list["CartItem"]] = relationship("CartItem", back_populates="product", foreign_keys="CartItem.product_onec_id", lazy="raise", passive_deletes=True)
     favourited_by: Mapped[list["Favourite"]] = relationship("Favourite", back_populates="product", cascade="all, delete-orphan")
-    tg_categories: Mapped[list["TgCategory"]] = relationship("TgCategory", secondary=product_tg_categories, back_populates="products", lazy="selectin")
+    tg_categories: Mapped[list["TgCategory"]] = relationship("TgCategory", secondary=product_tg_categories, back_populates="products", lazy="raise")
 
-    def __str__(self) -> str:
+    def card_source(self) -> str:
+        """Raw HTML of the Telegram card, before normalize_html_for_telegram."""
         expiration_text = f"<b>ИНСТРУКЦИИ К ХРАНЕНИЮ</b>\n{self.expiration or 'Не имеются или <i>указаны выше</i>'}"
         usage_text = f"<b>ИНСТРУКЦИИ К ПРИММЕНЕНИЮ</b>\n{self.usage or 'Не имеются или <i>указаны выше</i>'}"
         description_text = f"<b>ОПИСАНИЕ</b>\n{self.description or 'Не имеется'}"
-        prices_text = "\n".join([f"{feature.name} — {feature.price}₽" for feature in self.features])
-        from src.helpers import normalize_html_for_telegram
-        return normalize_html_for_telegram(
+        prices_text = "\n".join([f"{feature.name} — {feature.price}₽" for feature in sorted(self.features, key=lambda f: f.id)])
+        return (
             f"<b>{self.name}</b>\n"
             f"Артикул: <i>{self.code}</i>\n"
             f"\n\n"
@@ -41,3 +53,12 @@ class Product(Base):
             f"<b>ДОЗИРОВКИ И ЦЕНЫ:</b>\n"
             f"{prices_text}"
         )
+
+    def telegram_card(self) -> tuple[str, str]:
+        """Telegram HTML card and its plain-text fallback: the stored ones while they match, otherwise rendered on the spot."""
+        from src.webapp.crud.product_card import card_hash, render_card
+        source = self.card_source()
+        if "tg_card" not in inspect(self).unloaded and self.tg_card is not None and self.tg_card_hash == card_hash(source): return self.tg_card, self.tg_card_text
+        return render_card(source)
+
+    def __str__(self) -> str: return self.telegram_card()[0]
@@ -0,0 +1,32 @@
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, Numeric, SmallInteger, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.webapp.database import Base
+
+
+class ProductListing(Base):
+    """
+    Per-product stock and price aggregates over its features, kept for listing and sorting.
+    Refreshed by crud.product_listing.refresh_product_listings after every catalog write.
+    """
+    __tablename__ = "product_listings"
+
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    has_stock: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    stock_rank: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=1)
+    min_stock_price: Mapped[Decimal | None] = mapped_column(Numeric(10, 2), nullable=True)
+    max_stock_price: Mapped[Decimal | None] = mapped_column(Numeric(10, 2), nullable=True)
+    # Sort keys with missing prices already replaced by sentinels that put them last
+    sort_price_asc: Mapped[Decimal] = mapped_column(Numeric, nullable=False)
+    sort_price_desc: Mapped[Decimal] = mapped_column(Numeric, nullable=False)
+    lower_name: Mapped[str] = mapped_column(String, nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+# One index per search_products sort, in the exact column order and direction of its ORDER BY
+Index("ix_product_listings_name_asc", ProductListing.stock_rank, ProductListing.lower_name, ProductListing.sort_price_asc, ProductListing.product_id)
+Index("ix_product_listings_name_desc", ProductListing.stock_rank, ProductListing.lower_name.desc(), ProductListing.sort_price_asc, ProductListing.product_id)
+Index("ix_product_listings_price_asc", ProductListing.stock_rank, ProductListing.sort_price_asc, ProductListing.lower_name, ProductListing.product_id)
+Index("ix_product_listings_price_desc", ProductListing.stock_rank, ProductListing.sort_price_desc.desc(), ProductListing.lower_name, ProductListing.product_id)
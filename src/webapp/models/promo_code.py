@@ -36,7 +36,7 @@ class PromoCode(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
 
-    carts: Mapped[list["Cart"]] = relationship("Cart", back_populates="promo", lazy="selectin", foreign_keys="Cart.promo_code")
+    carts: Mapped[list["Cart"]] = relationship("Cart", back_populates="promo", lazy="raise", foreign_keys="Cart.promo_code")
 
     def __str__(self) -> str:
         return f"{self.code}: Скидка {self.discount_pct}"
@@ -15,7 +15,7 @@ class TgCategory(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now(), index=True)
 
-    products: Mapped[list["Product"]] = relationship("Product", secondary=product_tg_categories, back_populates="tg_categories", lazy="selectin")
+    products: Mapped[list["Product"]] = relationship("Product", secondary=product_tg_categories, back_populates="tg_categories", lazy="raise")
 
     def __repr__(self) -> str:
         return f"<TgCategory id={self.id} name={self.name!r}>"
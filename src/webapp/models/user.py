@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, DateTime, Double, String, func, literal
+from sqlalchemy import BigInteger, Computed, DateTime, Double, Index, String, func, literal
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -9,6 +9,12 @@ from src.webapp.database import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_tg_id_text_trgm", "tg_id_text", postgresql_using="gin", postgresql_ops={"tg_id_text": "gin_trgm_ops"}),
+        Index("ix_users_phone_digits_trgm", "phone_digits", postgresql_using="gin", postgresql_ops={"phone_digits": "gin_trgm_ops"}),
+        Index("ix_users_tg_phone_digits_trgm", "tg_phone_digits", postgresql_using="gin", postgresql_ops={"tg_phone_digits": "gin_trgm_ops"}),
+        Index("ix_users_search_full_name_trgm", "search_full_name", postgresql_using="gin", postgresql_ops={"search_full_name": "gin_trgm_ops"}),
+    )
 
     tg_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True, autoincrement=False)
     tg_ref_id: Mapped[int | None] = mapped_column(BigInteger, index=True, autoincrement=False, nullable=True, default=None)
@@ -25,6 +31,12 @@ class User(Base):
     output_tokens: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
     blocked_until: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, default=None)
 
+    # Search-only columns, generated by Postgres on every write (see search_users)
+    tg_id_text: Mapped[str] = mapped_column(String, Computed("tg_id::text", persisted=True))
+    phone_digits: Mapped[str | None] = mapped_column(String, Computed("regexp_replace(phone, '\\D', '', 'g')", persisted=True), nullable=True)
+    tg_phone_digits: Mapped[str | None] = mapped_column(String, Computed("regexp_replace(tg_phone, '\\D', '', 'g')", persisted=True), nullable=True)
+    search_full_name: Mapped[str] = mapped_column(String, Computed("coalesce(nullif(trim(coalesce(name, '') || ' ' || coalesce(surname, '')), ''), 'Без имени')", persisted=True))
+
     carts: Mapped[list["Cart"]] = relationship("Cart", back_populates="user", cascade="all, delete-orphan")
     favourites: Mapped[list["Favourite"]] = relationship("Favourite", back_populates="user", cascade="all, delete-orphan")
     token_usage: Mapped[list["UserTokenUsage"]] = relationship("UserTokenUsage", back_populates="user")
@@ -1,6 +1,6 @@
 __all__ = [
     'product_router', 'cart_router', 'search_router', 'yandex_router', 'favourite_router', 'promo_codes_router',
-    'cdek_router', 'payments_router', 'users_router', 'webhooks_router', 'auth_router', 'categories_router', 'internal_bot_router'
+    'cdek_router', 'payments_router', 'users_router', 'webhooks_router', 'auth_router', 'categories_router', 'internal_bot_router', 'catalog_router'
 ]
 
 from .cart import router as cart_router
@@ -15,3 +15,4 @@ from .favourite import router as favourite_router
 from .categories import router as categories_router
 from .promocodes import router as promo_codes_router
 from .internal_bot import router as internal_bot_router
+from .catalog import router as catalog_router
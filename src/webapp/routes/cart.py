@@ -19,12 +19,12 @@ async def get_orders(user_id: int = Query(...), db: AsyncSession = Depends(get_d
 @router.get("/product/{onec_id}")
 async def get_cart_product(onec_id: str, feature_id: str = Query("", alias="feature_id"), db: AsyncSession = Depends(get_db)):
     product = await get_product(db, 'onec_id', onec_id)
-    if not product: raise HTTPException(status_code=404, detail="Product not found")
+    if not product or not product.is_active: raise HTTPException(status_code=404, detail="Product not found")
 
     feature = None
     if feature_id:
         feature = await get_feature(db, 'onec_id', feature_id)
-        if not feature: raise HTTPException(status_code=404, detail="Feature not found")
+        if not feature or not feature.is_active: raise HTTPException(status_code=404, detail="Feature not found")
 
     return {"product": product.to_dict(), "feature": feature.to_dict()}
 
@@ -48,7 +48,7 @@ async def cart_json(cart_data: dict = Body(...), db: AsyncSession = Depends(get_
     feature_map = {}
 
     if feature_ids:
-        result = await db.execute(select(Feature).where(Feature.onec_id.in_(feature_ids)))
+        result = await db.execute(select(Feature).where(Feature.onec_id.in_(feature_ids), Feature.is_active))
         features = result.scalars().all()
         feature_map = {f.onec_id: f for f in features}
 
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import CATALOG_CACHE_CONTROL
+from src.webapp.database import get_db
+from src.webapp.snapshot import catalog_snapshot
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+@router.get("/snapshot")
+async def snapshot(request: Request, db: AsyncSession = Depends(get_db)):
+    blob = await catalog_snapshot.ensure(db)
+    headers = {"ETag": blob.etag, "X-Catalog-Version": blob.version, "Cache-Control": CATALOG_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and blob.etag in {t.strip().removeprefix("W/") for t in if_none_match.split(",")}: return Response(status_code=304, headers=headers)
+
+    encoding, body = blob.best(request.headers.get("accept-encoding", ""))
+    if encoding != "identity": headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
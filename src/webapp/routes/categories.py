@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.webapp.database import get_db
+from src.webapp.http_cache import catalog_response
 from src.webapp.models import TgCategory
 
 router = APIRouter(prefix="/tg-categories", tags=["tg-categories"])
@@ -10,6 +11,9 @@ router = APIRouter(prefix="/tg-categories", tags=["tg-categories"])
 
 @router.get("")
 @router.get("/")
-async def list_categories(db: AsyncSession = Depends(get_db)):
-    rows = (await db.execute(select(TgCategory).order_by(TgCategory.name.asc()))).scalars().all()
-    return [{"id": c.id, "name": c.name, "description": c.description} for c in rows]
\ No newline at end of file
+async def list_categories(request: Request, db: AsyncSession = Depends(get_db)):
+    async def build():
+        rows = (await db.execute(select(TgCategory).order_by(TgCategory.name.asc()))).scalars().all()
+        return [{"id": c.id, "name": c.name, "description": c.description} for c in rows]
+
+    return await catalog_response(request, build)
\ No newline at end of file
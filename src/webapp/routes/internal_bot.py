@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import NEW_BOT_TOKEN
 from src.helpers import cart_analysis_text, user_carts_analytics_text
+from src.onec.history import sync_history
 from src.webapp.crud import (
     create_used_code,
     get_cart_by_id,
@@ -83,7 +84,7 @@ def _serialize_feature(feature: Any) -> dict[str, Any]:
     return _to_jsonable({"onec_id": feature.onec_id, "product_onec_id": feature.product_onec_id, "name": feature.name, "code": feature.code, "file_id": feature.file_id, "price": feature.price, "balance": feature.balance})
 
 
-def _serialize_product(product: Any) -> dict[str, Any] | None:
+def _serialize_product(product: Any, with_card: bool = False) -> dict[str, Any] | None:
     if not product: return None
     return _to_jsonable(
         {
@@ -96,6 +97,7 @@ def _serialize_product(product: Any) -> dict[str, Any] | None:
             "expiration": product.expiration,
             "category_onec_id": product.category_onec_id,
             "features": [_serialize_feature(feature) for feature in (product.features or [])],
+            **(dict(zip(("tg_card", "tg_card_text"), product.telegram_card())) if with_card else {}),
         }
     )
 
@@ -192,6 +194,12 @@ def _verify_bot_auth(request: Request) -> None:
     if not hmac.compare_digest(signature, expected_sig): raise HTTPException(status_code=401, detail="Invalid bot signature")
 
 
+@router.get("/sync_status")
+async def sync_status(limit: int = 20, kind: str | None = None, _: None = Depends(_verify_bot_auth)):
+    """The latest 1C sync runs, newest first, and when each kind of sync last finished without failing."""
+    return {"ok": True, "result": {"now": time.time(), "last_success": sync_history.last_success(), "runs": sync_history.runs(max(1, min(limit, 100)), kind)}}
+
+
 @router.post("/rpc")
 async def bot_rpc(body: BotRpcIn, db: AsyncSession = Depends(get_db), _: None = Depends(_verify_bot_auth)):
     action = body.action
@@ -243,8 +251,8 @@ async def bot_rpc(body: BotRpcIn, db: AsyncSession = Depends(get_db), _: None =
         return {"ok": True, "result": _to_jsonable(totals)}
 
     if action == "get_product_with_features":
-        product = await get_product_with_features(db, payload.get("onec_id"))
-        return {"ok": True, "result": _serialize_product(product)}
+        product = await get_product_with_features(db, payload.get("onec_id"), with_card=True)
+        return {"ok": True, "result": _serialize_product(product, with_card=True)}
 
     if action == "get_used_code_by_code":
         used_code = await get_used_code_by_code(db, str(payload.get("code") or ""))
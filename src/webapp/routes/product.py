@@ -1,26 +1,43 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.webapp.crud import get_product_with_features
+from src.webapp.crud import get_product_with_features, get_products_with_features
 from src.webapp.database import get_db
+from src.webapp.http_cache import catalog_response
+from src.webapp.images import image_urls
+from src.webapp.models import Product
+from src.webapp.schemas import ProductBatchRequest
 
 router = APIRouter(prefix="/product")
 
-@router.get("/{onec_id}/json", response_class=JSONResponse)
-async def product_json(onec_id: str, db: AsyncSession = Depends(get_db)):
-    product = await get_product_with_features(db, onec_id)
-    if not product: return {"error": "Product not found"}
-
+def product_payload(product: Product) -> dict:
     features_list = [{
         "onec_id": f.onec_id,
         "name": f.name,
         "price": f.price,
-        "balance": f.balance
+        "balance": f.balance,
+        "image": image_urls(f.onec_id, fallback=False).get("full")
     } for f in product.features]
 
     return {"product": {
         "onec_id": product.onec_id,
         "name": product.name,
-        "description": product.description
+        "description": product.description,
+        "images": image_urls(product.onec_id)
     }, "features": features_list}
+
+@router.post("/batch", response_class=JSONResponse)
+async def product_batch(batch: ProductBatchRequest, db: AsyncSession = Depends(get_db)):
+    products = await get_products_with_features(db, batch.onec_ids)
+    found = {product.onec_id for product in products}
+    return {"products": [product_payload(product) for product in products], "missing": [onec_id for onec_id in dict.fromkeys(batch.onec_ids) if onec_id not in found]}
+
+@router.get("/{onec_id}/json", response_class=JSONResponse)
+async def product_json(onec_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    async def build():
+        product = await get_product_with_features(db, onec_id)
+        if not product: return {"error": "Product not found"}
+        return product_payload(product)
+
+    return await catalog_response(request, build)
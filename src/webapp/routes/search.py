@@ -1,22 +1,41 @@
 from typing import Literal
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.webapp.crud.search import search_products, search_users
+from src.helpers import require_internal_token
+from src.webapp.crud.search import result_cache, search_facets, search_products, search_users, suggest_products, total_cache
 from src.webapp.database import get_db
+from src.webapp.http_cache import catalog_response
 
 router = APIRouter(prefix="/search", tags=["search"])
 
 @router.get("/products")
-async def products(q: str | None = Query(None), page: int = Query(0, ge=0), limit: int = Query(10, ge=1), tg_category_ids: str | None = Query(None, description="CSV: 1,2,3"), tg_category_mode: Literal["any", "all"] = Query("any"), sort_by: Literal["name", "price"] = Query("name"), sort_dir: Literal["asc", "desc"] = Query("asc"), db: AsyncSession = Depends(get_db)):
-    return await search_products(db, q=q, page=page, limit=limit, tg_category_ids=tg_category_ids, tg_category_mode=tg_category_mode, sort_by=sort_by, sort_dir=sort_dir)
+async def products(request: Request, q: str | None = Query(None), page: int = Query(0, ge=0), limit: int = Query(10, ge=1), tg_category_ids: str | None = Query(None, description="CSV: 1,2,3"), tg_category_mode: Literal["any", "all"] = Query("any"), sort_by: Literal["name", "price"] = Query("name"), sort_dir: Literal["asc", "desc"] = Query("asc"), cursor: str | None = Query(None, description="next_cursor of the previous page"), fuzzy: bool = Query(False, description="Typo-tolerant matching"), db: AsyncSession = Depends(get_db)):
+    async def build():
+        try: return await search_products(db, q=q, page=page, limit=limit, tg_category_ids=tg_category_ids, tg_category_mode=tg_category_mode, sort_by=sort_by, sort_dir=sort_dir, cursor=cursor, fuzzy=fuzzy)
+        except ValueError as e: raise HTTPException(status_code=400, detail=str(e))
+
+    return await catalog_response(request, build)
+
+@router.get("/suggest")
+async def suggest(prefix: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50), db: AsyncSession = Depends(get_db)):
+    rows = await suggest_products(db, prefix, limit)
+    return {"results": [{"name": r["name"], "onec_id": r["onec_id"], "url": r["url"]} for r in rows]}
+
+@router.get("/facets")
+async def facets(q: str | None = Query(None), tg_category_ids: str | None = Query(None, description="CSV: 1,2,3"), tg_category_mode: Literal["any", "all"] = Query("any"), fuzzy: bool = Query(False), db: AsyncSession = Depends(get_db)):
+    return await search_facets(db, q=q, tg_category_ids=tg_category_ids, tg_category_mode=tg_category_mode, fuzzy=fuzzy)
 
 @router.get("/users")
 async def users(by: str | None = Query(None), value: str | None = Query(None), page: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=200), db: AsyncSession = Depends(get_db)):
-    rows, total = await search_users(by, value, page, limit, db)
+    rows, total = await search_users(db, by, value, page, limit)
     return {
         "page": page,
         "limit": limit,
         "total": int(total or 0),
         "items": rows,
     }
+
+@router.get("/cache", dependencies=[Depends(require_internal_token)])
+async def cache_stats():
+    return {"results": result_cache.stats(), "totals": total_cache.stats()}
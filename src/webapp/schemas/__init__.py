@@ -15,7 +15,7 @@ from .promo_code import *
 
 __all__ = [
     'CategoryUpdate', 'CategoryBase', 'CategoryRead', 'CategoryCreate',
-    'ProductUpdate', 'ProductBase', 'ProductRead', 'ProductCreate',
+    'ProductUpdate', 'ProductBase', 'ProductRead', 'ProductCreate', 'ProductBatchRequest',
     'UnitUpdate', 'UnitBase', 'UnitRead', 'UnitCreate',
     'FeatureUpdate', 'FeatureBase', 'FeatureRead', 'FeatureCreate',
     'UserUpdate', 'UserBase', 'UserRead', 'UserCreate',
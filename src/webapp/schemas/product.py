@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from config import PRODUCT_BATCH_LIMIT
 from src.webapp.schemas.tg_category import TgCategoryRead
 
 class ProductBase(BaseModel):
@@ -24,4 +26,6 @@ class ProductUpdate(BaseModel):
 class ProductRead(ProductBase):
     id: int
     tg_categories: list[TgCategoryRead] = []
-    class Config: from_attributes = True
\ No newline at end of file
+    class Config: from_attributes = True
+
+class ProductBatchRequest(BaseModel): onec_ids: list[str] = Field(..., min_length=1, max_length=PRODUCT_BATCH_LIMIT)
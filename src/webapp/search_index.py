@@ -0,0 +1,393 @@
+import asyncio
+import logging
+import re
+import time
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cmp_to_key
+from typing import Any, Literal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.webapp import catalog
+from src.webapp.crud.loading import PRODUCT_CARD
+from src.webapp.images import PLACEHOLDER_URL, image_urls
+from src.webapp.models import Product, ProductListing, TgCategory
+from src.webapp.models.product_tg_categories import product_tg_categories
+
+MAX_INDEX_AGE = 900
+NGRAM_SIZES = (1, 2, 3)
+FUZZY_CANDIDATES = 64
+FUZZY_PREFIX_PENALTY = 0.9
+SUGGEST_SCAN_LIMIT = 512
+SortBy = Literal["name", "price"]
+SortDir = Literal["asc", "desc"]
+SORTS: tuple[tuple[SortBy, SortDir], ...] = (("name", "asc"), ("name", "desc"), ("price", "asc"), ("price", "desc"))
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(norm_text: str) -> list[str]: return _TOKEN_RE.findall(norm_text)
+
+def ngrams(text: str, n: int) -> set[str]: return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+def max_typos(token: str) -> int:
+    if len(token) <= 3: return 0
+    if len(token) <= 5: return 1
+    if len(token) <= 9: return 2
+    return 3
+
+def bounded_levenshtein(a: str, b: str, max_dist: int) -> int | None:
+    """Edit distance between a and b, or None as soon as it is known to exceed max_dist."""
+    if abs(len(a) - len(b)) > max_dist: return None
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1): cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > max_dist: return None
+        prev = cur
+
+    return prev[-1] if prev[-1] <= max_dist else None
+
+
+@dataclass(slots=True)
+class IndexedProduct:
+    id: int
+    onec_id: str
+    name: str
+    norm_name: str
+    lower_name: str
+    category_ids: frozenset[int]
+    has_stock: bool
+    min_price: float | None
+    max_price: float | None
+    result: dict[str, Any]
+
+    @property
+    def stock_rank(self) -> int: return 0 if self.has_stock else 1
+
+
+@dataclass(slots=True)
+class _Snapshot:
+    products: list[IndexedProduct] = field(default_factory=list)
+    grams: dict[str, set[int]] = field(default_factory=dict)
+    by_category: dict[int, set[int]] = field(default_factory=dict)
+    orders: dict[tuple[str, str], list[int]] = field(default_factory=dict)
+    ranks: dict[tuple[str, str], list[int]] = field(default_factory=dict)
+    vocab: dict[str, set[int]] = field(default_factory=dict)
+    vocab_grams: dict[str, set[str]] = field(default_factory=dict)
+    categories: list[tuple[int, str]] = field(default_factory=list)
+    name_keys: list[tuple[str, int]] = field(default_factory=list)
+    word_keys: list[tuple[str, int]] = field(default_factory=list)
+    version: str | None = None
+    built_at: float = 0.0
+
+
+def _float(value: Any) -> float | None: return float(value) if value is not None else None
+
+def _stock_stats(product: Product) -> tuple[bool, float | None, float | None]:
+    """has_stock, min and max in-stock price straight from the features, for products without a ProductListing row yet."""
+    in_stock_prices = [float(f.price) for f in (product.features or []) if (f.balance or 0) > 0 and f.price is not None]
+    has_stock = any((f.balance or 0) > 0 for f in (product.features or []))
+    return has_stock, min(in_stock_prices, default=None), max(in_stock_prices, default=None)
+
+def product_result(product: Product) -> dict[str, Any]:
+    images = image_urls(product.onec_id)
+    return {
+        "name": product.name,
+        "onec_id": product.onec_id,
+        "url": f"/product/{product.onec_id}",
+        "image": images.get("card", PLACEHOLDER_URL),
+        "images": images,
+        "features": [
+            {
+                "id": f.onec_id,
+                "name": f.name,
+                "price": float(f.price) if f.price is not None else None,
+                "balance": getattr(f, "balance", 0) or 0,
+                "image": image_urls(f.onec_id, fallback=False).get("card"),
+            }
+            for f in (product.features or [])
+        ],
+    }
+
+
+SortKey = tuple[int, float | None, str, int]
+
+
+def sort_key(entry: IndexedProduct, sort_by: SortBy, sort_dir: SortDir) -> SortKey:
+    """Canonical (stock rank, price, lower(name), id) tuple: used for ordering and as the keyset cursor."""
+    price = entry.max_price if (sort_by, sort_dir) == ("price", "desc") else entry.min_price
+    return entry.stock_rank, price, entry.lower_name, entry.id
+
+
+def compare_keys(a: SortKey, b: SortKey, sort_by: SortBy, sort_dir: SortDir) -> int:
+    """
+    Same ordering as the old SQL listing: stock first, then the requested sort, then the other of name/price, then id.
+    Missing prices always go last, whatever the direction.
+    """
+    fields = (0, 1, 2, 3) if sort_by == "price" else (0, 2, 1, 3)
+    for i in fields:
+        x, y = a[i], b[i]
+        if x == y: continue
+        if x is None: return 1
+        if y is None: return -1
+        desc = sort_dir == "desc" and ((i == 1 and sort_by == "price") or (i == 2 and sort_by == "name"))
+        if desc: return -1 if x > y else 1
+        return -1 if x < y else 1
+
+    return 0
+
+
+def _ordered(products: list[IndexedProduct], sort_by: SortBy, sort_dir: SortDir) -> list[int]:
+    keys = [sort_key(p, sort_by, sort_dir) for p in products]
+    cmp = cmp_to_key(lambda a, b: compare_keys(a, b, sort_by, sort_dir))
+    return sorted(range(len(products)), key=lambda i: cmp(keys[i]))
+
+
+class ProductSearchIndex:
+    """
+    In-process index over the sellable catalog.
+    Names are normalized (transliterated + lower-cased) once per rebuild, substring/token matching goes through
+    n-gram postings and every sort order is precomputed, so a query never touches the database.
+    """
+
+    def __init__(self, max_age: float = MAX_INDEX_AGE):
+        self.max_age = max_age
+        self.log = logging.getLogger(self.__class__.__name__)
+        self._snapshot = _Snapshot()
+        self._lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int: return len(self._snapshot.products)
+
+    def is_stale(self) -> bool:
+        snap = self._snapshot
+        if snap.version != catalog.version(): return True
+        return time.monotonic() - snap.built_at > self.max_age
+
+    def invalidate(self) -> None: self._snapshot.version = None
+
+    async def ensure(self, db: AsyncSession) -> None:
+        if not self.is_stale(): return
+        async with self._lock:
+            if self.is_stale(): await self._rebuild(db)
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        async with self._lock: await self._rebuild(db)
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        from src.helpers import normalize
+
+        started = time.perf_counter()
+        version = catalog.version()
+        rows = (await db.execute(select(Product).options(*PRODUCT_CARD).where(Product.is_active).order_by(Product.id))).scalars().all()
+        links = (await db.execute(select(product_tg_categories.c.product_onec_id, product_tg_categories.c.tg_category_id))).all()
+        listing = ProductListing.__table__.c
+        stats = {row.product_id: (row.has_stock, _float(row.min_stock_price), _float(row.max_stock_price)) for row in (await db.execute(select(listing.product_id, listing.has_stock, listing.min_stock_price, listing.max_stock_price))).all()}
+        cats_by_product: dict[str, set[int]] = {}
+        for onec_id, category_id in links: cats_by_product.setdefault(onec_id, set()).add(category_id)
+
+        snap = _Snapshot(version=version)
+        snap.categories = [(c.id, c.name) for c in (await db.execute(select(TgCategory.id, TgCategory.name).order_by(TgCategory.name))).all()]
+        for product in rows:
+            has_stock, min_price, max_price = stats.get(product.id) or _stock_stats(product)
+            pos = len(snap.products)
+            entry = IndexedProduct(
+                id=product.id,
+                onec_id=product.onec_id,
+                name=product.name,
+                norm_name=product.search_name or await normalize(product.name or ""),
+                lower_name=(product.name or "").lower(),
+                category_ids=frozenset(cats_by_product.get(product.onec_id, ())),
+                has_stock=has_stock,
+                min_price=min_price,
+                max_price=max_price,
+                result=product_result(product),
+            )
+            snap.products.append(entry)
+            for n in NGRAM_SIZES:
+                for gram in ngrams(entry.norm_name, n): snap.grams.setdefault(gram, set()).add(pos)
+            for category_id in entry.category_ids: snap.by_category.setdefault(category_id, set()).add(pos)
+            tokens = tokenize(entry.norm_name)
+            for token in {*tokens, "".join(tokens)} - {""}: snap.vocab.setdefault(token, set()).add(pos)
+
+        for token in snap.vocab:
+            for gram in ngrams(f" {token} ", 3): snap.vocab_grams.setdefault(gram, set()).add(token)
+
+        for pos, entry in enumerate(snap.products):
+            for form in {entry.lower_name, entry.norm_name}:
+                snap.name_keys.append((form, pos))
+                snap.word_keys.extend((form[m.start():], pos) for m in _TOKEN_RE.finditer(form) if m.start())
+        snap.name_keys.sort()
+        snap.word_keys.sort()
+
+        for key in SORTS:
+            order = _ordered(snap.products, *key)
+            rank = [0] * len(order)
+            for r, pos in enumerate(order): rank[pos] = r
+            snap.orders[key] = order
+            snap.ranks[key] = rank
+
+        snap.built_at = time.monotonic()
+        self._snapshot = snap
+        self.log.info(f"🔎 Search index rebuilt: {len(snap.products)} products in {(time.perf_counter() - started) * 1000:.1f} ms (catalog {version})")
+
+    def _match_token(self, snap: _Snapshot, token: str) -> set[int]:
+        if len(token) <= NGRAM_SIZES[-1]: return set(snap.grams.get(token, ()))
+        postings = [snap.grams.get(gram) for gram in ngrams(token, NGRAM_SIZES[-1])]
+        if not all(postings): return set()
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return {pos for pos in candidates if token in snap.products[pos].norm_name}
+
+    def _match(self, snap: _Snapshot, norm_q: str | None) -> set[int] | None:
+        tokens = tokenize(norm_q or "")
+        if not tokens: return None
+        matched: set[int] | None = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            hits = self._match_token(snap, token)
+            matched = hits if matched is None else matched & hits
+            if not matched: return set()
+
+        return matched
+
+    @staticmethod
+    def _filter_categories(snap: _Snapshot, candidates: set[int] | None, category_ids: list[int], mode: Literal["any", "all"]) -> set[int] | None:
+        if not category_ids: return candidates
+        postings = [snap.by_category.get(c, set()) for c in category_ids]
+        allowed = set().union(*postings) if mode == "any" else set(postings[0]).intersection(*postings[1:])
+        return allowed if candidates is None else candidates & allowed
+
+    @staticmethod
+    def _similar_tokens(snap: _Snapshot, token: str) -> dict[str, float]:
+        """Vocabulary tokens within max_typos(token) edits of `token` (or of their same-length prefix), with a 0..1 score."""
+        max_dist = max_typos(token)
+        if not max_dist: return {}
+        shared = Counter()
+        for gram in ngrams(f" {token} ", 3):
+            for candidate in snap.vocab_grams.get(gram, ()): shared[candidate] += 1
+
+        similar: dict[str, float] = {}
+        for candidate, _ in shared.most_common(FUZZY_CANDIDATES):
+            dist = bounded_levenshtein(token, candidate, max_dist)
+            score = 1 - dist / (len(token) + 1) if dist is not None else 0.0
+            if len(candidate) > len(token):
+                prefix_dist = bounded_levenshtein(token, candidate[:len(token)], max_dist)
+                if prefix_dist is not None: score = max(score, (1 - prefix_dist / (len(token) + 1)) * FUZZY_PREFIX_PENALTY)
+            if score > 0: similar[candidate] = score
+
+        return similar
+
+    def _fuzzy_match(self, snap: _Snapshot, norm_q: str | None) -> dict[int, float] | None:
+        """Every query token has to match each hit, exactly (score 1) or within the typo budget (score < 1)."""
+        tokens = set(tokenize(norm_q or ""))
+        if not tokens: return None
+        scores: dict[int, float] | None = None
+        for token in tokens:
+            token_scores: dict[int, float] = {}
+            for candidate, score in self._similar_tokens(snap, token).items():
+                for pos in snap.vocab[candidate]: token_scores[pos] = max(token_scores.get(pos, 0.0), score)
+            for pos in self._match_token(snap, token): token_scores[pos] = 1.0
+            scores = token_scores if scores is None else {pos: scores[pos] + score for pos, score in token_scores.items() if pos in scores}
+            if not scores: return {}
+
+        return scores
+
+    def fuzzy_search(self, norm_q: str | None, category_ids: list[int] | None = None, category_mode: Literal["any", "all"] = "any", sort_by: SortBy = "name", sort_dir: SortDir = "asc", offset: int = 0, limit: int = 10) -> tuple[list[dict[str, Any]], int, str | None]:
+        """
+        Typo-tolerant search: hits are ranked by match score, then by the requested sort.
+        The third value is the best hit's name when it is not an exact match ("did you mean").
+        """
+        snap = self._snapshot
+        scores = self._fuzzy_match(snap, norm_q)
+        if scores is None:
+            results, total, _ = self.search(norm_q, category_ids, category_mode, sort_by, sort_dir, offset, limit)
+            return results, total, None
+
+        candidates = self._filter_categories(snap, set(scores), category_ids or [], category_mode)
+        rank = snap.ranks[(sort_by, sort_dir)]
+        ordered = sorted(candidates, key=lambda pos: (-scores[pos], rank[pos]))
+        exact = len(set(tokenize(norm_q or "")))
+        did_you_mean = snap.products[ordered[0]].name if ordered and scores[ordered[0]] < exact else None
+        return [dict(snap.products[pos].result) for pos in ordered[offset: offset + limit]], len(ordered), did_you_mean
+
+    def did_you_mean(self, norm_q: str | None) -> str | None:
+        snap = self._snapshot
+        scores = self._fuzzy_match(snap, norm_q)
+        if not scores: return None
+        rank = snap.ranks[("name", "asc")]
+        return snap.products[min(scores, key=lambda pos: (-scores[pos], rank[pos]))].name
+
+    def facets(self, norm_q: str | None, category_ids: list[int] | None = None, category_mode: Literal["any", "all"] = "any", fuzzy: bool = False) -> dict[str, Any]:
+        """
+        Hit and in-stock counts per tg category for a query, in one pass over the hits.
+        In "any" mode the selected categories are ignored so every category shows what it would add;
+        in "all" mode they narrow the hits, so the counts describe the next drill-down step.
+        """
+        snap = self._snapshot
+        matched = self._fuzzy_match(snap, norm_q) if fuzzy else self._match(snap, norm_q)
+        matched = set(matched) if matched is not None else None
+        if category_mode == "all": matched = self._filter_categories(snap, matched, category_ids or [], category_mode)
+
+        total = in_stock = 0
+        counts: dict[int, list[int]] = {}
+        for pos in (range(len(snap.products)) if matched is None else matched):
+            product = snap.products[pos]
+            total += 1
+            in_stock += product.has_stock
+            for category_id in product.category_ids:
+                bucket = counts.setdefault(category_id, [0, 0])
+                bucket[0] += 1
+                bucket[1] += product.has_stock
+
+        return {
+            "total": total,
+            "in_stock": in_stock,
+            "categories": [{"id": cid, "name": name, "total": counts.get(cid, (0, 0))[0], "in_stock": counts.get(cid, (0, 0))[1]} for cid, name in snap.categories],
+        }
+
+    @staticmethod
+    def _scan_prefix(keys: list[tuple[str, int]], prefix: str, seen: dict[int, None], limit: int) -> None:
+        i = bisect_left(keys, (prefix, -1))
+        end = min(len(keys), i + SUGGEST_SCAN_LIMIT)
+        while i < end and len(seen) < limit and keys[i][0].startswith(prefix):
+            seen.setdefault(keys[i][1], None)
+            i += 1
+
+    def suggest(self, prefixes: list[str], limit: int = 10) -> list[dict[str, Any]]:
+        """
+        Autocomplete over sorted prefix arrays: names starting with the prefix first, then names with a word starting with it.
+        Each prefix form (raw lower-case Cyrillic, transliterated) is looked up; cost is O(log n + limit).
+        """
+        snap = self._snapshot
+        prefixes = [p for p in dict.fromkeys(prefixes) if p]
+        seen: dict[int, None] = {}
+        for keys in (snap.name_keys, snap.word_keys):
+            for prefix in prefixes: self._scan_prefix(keys, prefix, seen, limit)
+
+        return [dict(snap.products[pos].result) for pos in seen]
+
+    def search(self, norm_q: str | None, category_ids: list[int] | None = None, category_mode: Literal["any", "all"] = "any", sort_by: SortBy = "name", sort_dir: SortDir = "asc", offset: int = 0, limit: int = 10, after: SortKey | None = None) -> tuple[list[dict[str, Any]], int, SortKey | None]:
+        """
+        Returns the requested page, the total number of hits and the sort key of the last row when more rows follow.
+        With `after` (a key from a previous page) the page starts right behind it and `offset` is ignored.
+        """
+        snap = self._snapshot
+        key = (sort_by, sort_dir)
+        candidates = self._filter_categories(snap, self._match(snap, norm_q), category_ids or [], category_mode)
+        if candidates is None: ordered = snap.orders.get(key, [])
+        else: ordered = sorted(candidates, key=snap.ranks[key].__getitem__)
+
+        if after is not None:
+            cmp = cmp_to_key(lambda a, b: compare_keys(a, b, sort_by, sort_dir))
+            offset = bisect_right(ordered, cmp(after), key=lambda pos: cmp(sort_key(snap.products[pos], sort_by, sort_dir)))
+
+        page = ordered[offset: offset + limit]
+        next_key = sort_key(snap.products[page[-1]], sort_by, sort_dir) if page and offset + limit < len(ordered) else None
+        return [dict(snap.products[pos].result) for pos in page], len(ordered), next_key
+
+
+search_index = ProductSearchIndex()
+catalog.on_change(search_index.invalidate)
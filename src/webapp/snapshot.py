@@ -0,0 +1,135 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+
+from dataclasses import dataclass
+from typing import Any
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.webapp import catalog
+from src.webapp.crud.loading import PRODUCT_CARD
+from src.webapp.images import PLACEHOLDER_URL, image_urls
+from src.webapp.models import Product, TgCategory
+from src.webapp.models.product_tg_categories import product_tg_categories
+from src.webapp.search_index import MAX_INDEX_AGE
+
+try: import brotli
+except ImportError: brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def _coding_weights(accept_encoding: str | None) -> dict[str, float]:
+    """Accept-Encoding as coding -> q value; a malformed q counts as a refusal."""
+    weights: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, *params = [p.strip() for p in part.split(";")]
+        if not coding: continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() != "q": continue
+            try: q = float(value)
+            except ValueError: q = 0.0
+
+        weights[coding.lower()] = q
+    return weights
+
+
+@dataclass(frozen=True, slots=True)
+class SnapshotBlob:
+    version: str
+    etag: str
+    built_at: float
+    products: int
+    encodings: dict[str, bytes]
+
+    def best(self, accept_encoding: str) -> tuple[str, bytes]:
+        """The smallest stored encoding the client accepts ("identity" is always acceptable)."""
+        weights = _coding_weights(accept_encoding)
+        for encoding in ("br", "gzip"):
+            # An explicitly listed coding wins over "*", in either direction
+            if encoding in self.encodings and weights.get(encoding, weights.get("*", 0.0)) > 0: return encoding, self.encodings[encoding]
+
+        return "identity", self.encodings["identity"]
+
+
+def _compress(raw: bytes) -> dict[str, bytes]:
+    encodings = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None: encodings["br"] = brotli.compress(raw, quality=BROTLI_QUALITY)
+    return encodings
+
+
+class CatalogSnapshot:
+    """
+    The whole sellable catalog (products with at least one priced feature, their features, tg categories and links)
+    serialized once per catalog version and kept pre-compressed in memory for /catalog/snapshot.
+    """
+
+    def __init__(self):
+        self._blob: SnapshotBlob | None = None
+        self._lock = asyncio.Lock()
+        self.log = logging.getLogger(self.__class__.__name__)
+
+    def is_stale(self) -> bool:
+        blob = self._blob
+        return blob is None or blob.version != catalog.version() or time.monotonic() - blob.built_at > MAX_INDEX_AGE
+
+    def invalidate(self) -> None: self._blob = None
+
+    async def ensure(self, db: AsyncSession) -> SnapshotBlob:
+        if self.is_stale():
+            async with self._lock:
+                if self.is_stale(): await self._rebuild(db)
+
+        return self._blob
+
+    async def rebuild(self, db: AsyncSession) -> SnapshotBlob:
+        async with self._lock: await self._rebuild(db)
+        return self._blob
+
+    async def _rebuild(self, db: AsyncSession) -> None:
+        started = time.perf_counter()
+        version = catalog.version()
+        products = (await db.execute(select(Product).options(*PRODUCT_CARD).where(Product.is_active).order_by(Product.id))).scalars().all()
+        links = (await db.execute(select(product_tg_categories.c.product_onec_id, product_tg_categories.c.tg_category_id))).all()
+        categories = (await db.execute(select(TgCategory.id, TgCategory.name, TgCategory.description).order_by(TgCategory.name))).all()
+        cats_by_product: dict[str, list[int]] = {}
+        for onec_id, category_id in links: cats_by_product.setdefault(onec_id, []).append(category_id)
+
+        payload = {
+            "tg_categories": [{"id": c.id, "name": c.name, "description": c.description} for c in categories],
+            "products": [_product_entry(p, sorted(cats_by_product.get(p.onec_id, ()))) for p in products if any(f.price for f in p.features)],
+        }
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        encodings = await asyncio.to_thread(_compress, raw)
+        # Content hash rather than the version (sent as X-Catalog-Version): identical catalogs keep their tag across restarts and workers
+        etag = '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+        self._blob = SnapshotBlob(version=version, etag=etag, built_at=time.monotonic(), products=len(payload["products"]), encodings=encodings)
+        sizes = ", ".join(f"{name}={len(body) / 1024:.1f} KiB" for name, body in encodings.items())
+        self.log.info(f"📦 Catalog snapshot built: {self._blob.products} products, {sizes} in {(time.perf_counter() - started) * 1000:.1f} ms (catalog {version})")
+
+
+def _product_entry(product: Product, tg_category_ids: list[int]) -> dict[str, Any]:
+    images = image_urls(product.onec_id)
+    return {
+        "id": product.id,
+        "onec_id": product.onec_id,
+        "name": product.name,
+        "code": product.code,
+        "category_onec_id": product.category_onec_id,
+        "tg_category_ids": tg_category_ids,
+        "url": f"/product/{product.onec_id}",
+        "image": images.get("card", PLACEHOLDER_URL),
+        "images": images,
+        "features": [{"onec_id": f.onec_id, "name": f.name, "price": float(f.price) if f.price is not None else None, "balance": f.balance or 0, "image": image_urls(f.onec_id, fallback=False).get("card")} for f in sorted(product.features, key=lambda f: f.id)],
+    }
+
+
+catalog_snapshot = CatalogSnapshot()
+catalog.on_change(catalog_snapshot.invalidate)
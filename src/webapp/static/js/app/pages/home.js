@@ -438,6 +438,7 @@ function productCardHTML(p) {
         name: String(f.name ?? ""),
         price: Number(f.price ?? 0),
         balance: Number(f.balance ?? 0),
+        image: f.image || null,
     }));
 
     const totalBalance = features.reduce((acc, f) => acc + (Number.isFinite(f.balance) ? f.balance : 0), 0);
@@ -449,7 +450,7 @@ function productCardHTML(p) {
         return (b.price || 0) - (a.price || 0);
     });
 
-    const productImgPath = `/static/images/${onecId}.png`;
+    const productImgPath = p.image || `/static/images/${onecId}.png`;
     const defaultImgPath = "/static/images/product.png";
 
     const firstInStockId = sortedFeatures.find((f) => f.balance > 0)?.id ?? null;
@@ -472,7 +473,7 @@ function productCardHTML(p) {
                     ${selected}
                     data-price="${Number(f.price ?? 0)}"
                     data-balance="${Number(f.balance ?? 0)}"
-                    data-feature-img="/static/images/${escapeHtml(f.id)}.png">
+                    data-feature-img="${escapeHtml(f.image || productImgPath)}">
               ${label}
             </option>
           `;
@@ -151,7 +151,7 @@ export async function renderProductDetailPage(onec_id) {
       <div class="product-main">
         <div class="product-image">
           <img
-            src="${productImgPath}"
+            src="${data.product.images?.full || productImgPath}"
             alt="${data.product.name || ""}"
             onerror="this.onerror=null;this.src='${defaultImgPath}';"
           >